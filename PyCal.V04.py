@@ -2,6 +2,10 @@ import tkinter as tk
 from math import sqrt, pow
 import re
 
+def hex_to_rgb(color):
+    """Converts a "#rrggbb" colour to an (r, g, b) tuple."""
+    return int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)
+
 class GamingCalculator:
     def __init__(self, root):
         self.root = root
@@ -26,6 +30,8 @@ class GamingCalculator:
             "operator": {"colors": ("#4a004a", "#7a007a"), "text": "#ff66ff"},
             "special": {"colors": ("#004d4d", "#007d7d"), "text": "#00ffff"}
         }
+        # Gradient images shared by all buttons, keyed by (style, width, height).
+        self.gradient_tiles = {}
 
         # Create display
         self.create_display()
@@ -112,14 +118,8 @@ class GamingCalculator:
         btn = tk.Canvas(parent, width=w, height=h, bg=self.bg_color, highlightthickness=0)
         btn.place(x=x, y=y)
         
-        # Button background with gradient
-        for i in range(h):
-            ratio = i / h
-            r = int((int(colors[0][1:3], 16) * (1 - ratio) + int(colors[1][1:3], 16) * ratio))
-            g = int((int(colors[0][3:5], 16) * (1 - ratio) + int(colors[1][3:5], 16) * ratio))
-            b = int((int(colors[0][5:7], 16) * (1 - ratio) + int(colors[1][5:7], 16) * ratio))
-            color = f"#{r:02x}{g:02x}{b:02x}"
-            btn.create_line(0, i, w, i, fill=color)
+        # Button background with gradient (one cached image instead of a line per row)
+        btn.create_image(0, 0, anchor=tk.NW, image=self.gradient_tile(style, w, h))
         
         # Rounded corners
         btn.create_oval(0, 0, 20, 20, fill=colors[1], outline="")
@@ -153,6 +153,25 @@ class GamingCalculator:
         ))
         btn.bind("<Button-1>", lambda e: command())
 
+    def gradient_tile(self, style, w, h):
+        """Returns the vertical gradient image for a button style, rendering it only once."""
+        key = (style, w, h)
+        tile = self.gradient_tiles.get(key)
+        if tile is None:
+            top, bottom = (hex_to_rgb(c) for c in self.button_styles[style]["colors"])
+            rows = []
+            for i in range(h):
+                ratio = i / h
+                r = int(top[0] * (1 - ratio) + bottom[0] * ratio)
+                g = int(top[1] * (1 - ratio) + bottom[1] * ratio)
+                b = int(top[2] * (1 - ratio) + bottom[2] * ratio)
+                color = f"#{r:02x}{g:02x}{b:02x}"
+                rows.append("{" + " ".join([color] * w) + "}")
+            tile = tk.PhotoImage(master=self.root, width=w, height=h)
+            tile.put(" ".join(rows))
+            self.gradient_tiles[key] = tile
+        return tile
+
     def update_display(self):
         self.display_frame.itemconfig(self.display_text, text=self.current_input[-20:])
         
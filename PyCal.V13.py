@@ -1,5 +1,5 @@
 import tkinter as tk
-from math import sqrt, log, log10, sin, cos, tan, pi, e
+from pycal.core import Calculator
 
 def get_button_colors(label):
     """
@@ -24,9 +24,7 @@ class NeonCalculator:
         self.root.title("Gamer Neon Calculator")
         self.root.geometry("500x750")
         self.root.configure(bg="#121212")
-        self.current_input = ""
-        self.memory = 0
-        self.history = []
+        self.calc = Calculator(degrees=False)
 
         self.entry = tk.Entry(root, font=("Helvetica Neue", 32, "bold"), justify="right", bd=0,
                               relief=tk.FLAT, bg="#1E1E1E", fg="#00E5FF", insertbackground="#00E5FF")
@@ -67,99 +65,17 @@ class NeonCalculator:
         self.root.bind("<Key>", self.on_key_press)
 
     def on_button_click(self, text):
-        if text == "=":
-            self.calculate_result()
-        elif text == "C":
-            self.clear_entry()
-        elif text == "AC":
-            self.clear_all()
-        elif text == "⌫":
-            self.backspace()
-        elif text == "±":
-            self.toggle_sign()
-        elif text == "√":
-            self.square_root()
-        elif text == "^":
-            self.update_entry("**")
-        elif text == "|x|":
-            self.absolute_value()
-        elif text == "log":
-            self.log_base_10()
-        elif text == "ln":
-            self.natural_log()
-        elif text in {"sin", "cos", "tan"}:
-            self.trigonometric_function(text)
-        elif text == "π":
-            self.update_entry(str(pi))
-        elif text == "e":
-            self.update_entry(str(e))
-        else:
-            self.update_entry(text)
+        self.calc.press(text)
+        self.refresh_entry()
 
     def on_key_press(self, event):
-        key = event.char
-        if key.isdigit() or key in "+-*/%().":
-            self.update_entry(key)
-        elif key == "\r":
-            self.calculate_result()
-        elif key == "\x08":
-            self.backspace()
+        label = self.calc.label_for_key(event.char)
+        if label is not None:
+            self.on_button_click(label)
 
-    def update_entry(self, text):
-        self.current_input += text
+    def refresh_entry(self):
         self.entry.delete(0, tk.END)
-        self.entry.insert(tk.END, self.current_input)
-
-    def clear_entry(self):
-        self.current_input = ""
-        self.entry.delete(0, tk.END)
-
-    def backspace(self):
-        self.current_input = self.current_input[:-1]
-        self.entry.delete(0, tk.END)
-        self.entry.insert(tk.END, self.current_input)
-
-    def toggle_sign(self):
-        if self.current_input:
-            self.current_input = str(-float(self.current_input))
-            self.entry.delete(0, tk.END)
-            self.entry.insert(tk.END, self.current_input)
-
-    def square_root(self):
-        self.calculate_operation(sqrt)
-
-    def absolute_value(self):
-        self.calculate_operation(abs)
-
-    def log_base_10(self):
-        self.calculate_operation(log10)
-
-    def natural_log(self):
-        self.calculate_operation(log)
-
-    def trigonometric_function(self, func):
-        self.calculate_operation({"sin": sin, "cos": cos, "tan": tan}[func])
-
-    def calculate_operation(self, operation):
-        try:
-            result = operation(float(self.current_input))
-            self.current_input = str(result)
-            self.entry.delete(0, tk.END)
-            self.entry.insert(tk.END, self.current_input)
-        except Exception:
-            self.entry.delete(0, tk.END)
-            self.entry.insert(tk.END, "Error")
-
-    def calculate_result(self):
-        try:
-            result = eval(self.current_input)
-            self.history.append(f"{self.current_input} = {result}")
-            self.current_input = str(result)
-            self.entry.delete(0, tk.END)
-            self.entry.insert(tk.END, self.current_input)
-        except Exception:
-            self.entry.delete(0, tk.END)
-            self.entry.insert(tk.END, "Error")
+        self.entry.insert(tk.END, self.calc.display_text())
 
 if __name__ == "__main__":
     root = tk.Tk()
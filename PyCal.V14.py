@@ -1,5 +1,5 @@
 import tkinter as tk
-from math import sqrt, log, log10, sin, cos, tan, pi, e
+from pycal.core import Calculator
 
 def get_button_colors(label):
     if label in {"0", "1", "2", "3", "4", "5", "6", "7", "8", "9", ".", "±"}:
@@ -56,9 +56,7 @@ class NeonCalculator:
         self.root.title("Gamer Neon Calculator")
         self.root.geometry("500x750")
         self.root.configure(bg="#121212")
-        self.current_input = ""
-        self.memory = 0
-        self.history = []
+        self.calc = Calculator(degrees=False)
         self.entry = tk.Entry(root, font=("Helvetica Neue", 32, "bold"), justify="right", bd=0, relief=tk.FLAT, bg="#1E1E1E", fg="#00E5FF", insertbackground="#00E5FF")
         self.entry.pack(fill=tk.BOTH, ipadx=10, ipady=20, padx=20, pady=(20, 10))
         self.history_label = tk.Label(root, text="", font=("Helvetica Neue", 12), bg="#121212", fg="#80DEEA", anchor="e", justify="right")
@@ -81,6 +79,19 @@ class NeonCalculator:
                 btn.grid(row=i, column=j, padx=8, pady=8, sticky="nsew")
         self.root.bind("<Key>", self.on_key_press)
 
+    def on_button_click(self, text):
+        self.calc.press(text)
+        self.refresh_entry()
+
+    def on_key_press(self, event):
+        label = self.calc.label_for_key(event.char)
+        if label is not None:
+            self.on_button_click(label)
+
+    def refresh_entry(self):
+        self.entry.delete(0, tk.END)
+        self.entry.insert(tk.END, self.calc.display_text())
+
 if __name__ == "__main__":
     root = tk.Tk()
     app = NeonCalculator(root)
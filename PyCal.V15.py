@@ -1,5 +1,12 @@
+import time
+STARTED = time.perf_counter()  # --profile-startup times the imports from here.
+import sys
 import tkinter as tk
-from math import sqrt, log, log10, sin, cos, tan, pi, e
+from pycal.core import Calculator
+from pycal.startup import StartupProfiler, after_first_paint
+
+# The first rows of the keypad hold the memory, log and trigonometric keys.
+SCIENTIFIC_ROWS = 3
 
 def get_button_colors(label):
     """
@@ -93,14 +100,17 @@ class NeonButton(tk.Canvas):
         self.draw_button()
 
 class NeonCalculator:
-    def __init__(self, root):
+    def __init__(self, root, scientific="eager", profiler=None):
+        """
+        scientific decides when the memory/log/trig rows are built: "eager"
+        with the rest, "idle" right after the first frame is painted, or
+        "toggle" when the "More" control is first opened.
+        """
         self.root = root
         self.root.title("Gamer Neon Calculator")
         self.root.geometry("550x850")
         self.root.configure(bg="#121212")
-        self.current_input = ""
-        self.memory = 0
-        self.history = []
+        self.calc = Calculator(degrees=False)
 
         # Display area for the current input/result.
         self.entry = tk.Entry(root, font=("Helvetica Neue", 32, "bold"), justify="right", bd=0,
@@ -112,6 +122,14 @@ class NeonCalculator:
                                       anchor="e", justify="right")
         self.history_label.pack(fill=tk.BOTH, padx=20, pady=(0, 10))
         
+        # Shows and hides the scientific rows in "toggle" mode.
+        self.more_label = None
+        if scientific == "toggle":
+            self.more_label = tk.Label(root, text="More ▾", font=("Helvetica Neue", 12), bg="#121212",
+                                       fg="#80DEEA", anchor="w", cursor="hand2")
+            self.more_label.pack(fill=tk.X, padx=20)
+            self.more_label.bind("<Button-1>", lambda e: self.toggle_scientific_rows())
+
         # Button grid frame.
         self.button_frame = tk.Frame(root, bg="#121212")
         self.button_frame.pack(expand=True, fill=tk.BOTH, padx=20, pady=10)
@@ -126,9 +144,40 @@ class NeonCalculator:
             ("1", "2", "3", "-", "="),
             ("0", ".", "±", "+", "⌫"),
         ]
+        self.scientific = scientific
+        self.profiler = profiler
+        self.button_rows = {}  # grid row -> NeonButtons in that row
+        if scientific == "eager":
+            self.deferred_rows = None
+            self.add_button_rows(buttons, 0)
+        else:
+            # Paint the basic keypad first and add the scientific rows later.
+            self.deferred_rows = buttons[:SCIENTIFIC_ROWS]
+            self.add_button_rows(buttons[SCIENTIFIC_ROWS:], SCIENTIFIC_ROWS)
+        for j in range(len(buttons[0])):
+            self.button_frame.grid_columnconfigure(j, weight=1)
 
-        # Create a NeonButton for each label.
-        for i, row in enumerate(buttons):
+        self.root.bind("<Key>", self.on_key_press)
+        if profiler is not None:
+            profiler.mark("widgets")
+        if profiler is not None or scientific == "idle":
+            after_first_paint(self.entry, self.on_first_paint)
+
+    def on_first_paint(self):
+        """Runs once, when the first frame is on screen."""
+        if self.profiler is not None:
+            self.profiler.mark("first paint")
+        if self.scientific == "idle":
+            self.show_scientific_rows()
+            if self.profiler is not None:
+                self.profiler.mark("scientific rows")
+        if self.profiler is not None:
+            self.profiler.finish()
+
+    def add_button_rows(self, buttons, first_row):
+        """Create a NeonButton for each label, from grid row first_row down."""
+        for i, row in enumerate(buttons, first_row):
+            widgets = []
             for j, text in enumerate(row):
                 frame_color, _ = get_button_colors(text)
                 btn = NeonButton(
@@ -140,120 +189,59 @@ class NeonCalculator:
                     font=("Helvetica Neue", 16, "bold")
                 )
                 btn.grid(row=i, column=j, padx=8, pady=8, sticky="nsew")
-
-        # Ensure the grid expands evenly.
-        for i in range(len(buttons)):
+                widgets.append(btn)
+            self.button_rows[i] = widgets
+            # Ensure the grid expands evenly.
             self.button_frame.grid_rowconfigure(i, weight=1)
-        for j in range(len(buttons[0])):
-            self.button_frame.grid_columnconfigure(j, weight=1)
 
-        self.root.bind("<Key>", self.on_key_press)
+    def show_scientific_rows(self, show=True):
+        """Show (building them if needed) or hide the scientific rows."""
+        if self.deferred_rows is not None:
+            self.add_button_rows(self.deferred_rows, 0)
+            self.deferred_rows = None
+        for i in range(SCIENTIFIC_ROWS):
+            for btn in self.button_rows[i]:
+                if show:
+                    btn.grid()
+                else:
+                    btn.grid_remove()
+            self.button_frame.grid_rowconfigure(i, weight=1 if show else 0)
+        self.scientific_shown = show
+        if self.more_label is not None:
+            self.more_label.config(text="Less ▴" if show else "More ▾")
+
+    def toggle_scientific_rows(self):
+        self.show_scientific_rows(self.deferred_rows is not None or not self.scientific_shown)
 
     def on_button_click(self, text):
-        if text == "=":
-            self.calculate_result()
-        elif text == "C":
-            self.clear_entry()
-        elif text == "AC":
-            self.clear_all()
-        elif text == "⌫":
-            self.backspace()
-        elif text == "±":
-            self.toggle_sign()
-        elif text == "√":
-            self.square_root()
-        elif text == "^":
-            self.update_entry("**")
-        elif text == "|x|":
-            self.absolute_value()
-        elif text == "log":
-            self.log_base_10()
-        elif text == "ln":
-            self.natural_log()
-        elif text in {"sin", "cos", "tan"}:
-            self.trigonometric_function(text)
-        elif text == "π":
-            self.update_entry(str(pi))
-        elif text == "e":
-            self.update_entry(str(e))
-        else:
-            self.update_entry(text)
+        # Editing, evaluation and memory all live in the core Calculator.
+        self.calc.press(text)
+        self.refresh_entry()
 
     def on_key_press(self, event):
-        key = event.char
-        if key.isdigit() or key in "+-*/%().":
-            self.update_entry(key)
-        elif key == "\r":
-            self.calculate_result()
-        elif key == "\x08":
-            self.backspace()
+        label = self.calc.label_for_key(event.char)
+        if label is not None:
+            self.on_button_click(label)
 
-    def update_entry(self, text):
-        self.current_input += text
+    def refresh_entry(self):
+        """Show the calculator's input, or "Error" after a failed command."""
         self.entry.delete(0, tk.END)
-        self.entry.insert(tk.END, self.current_input)
-
-    def clear_entry(self):
-        self.current_input = ""
-        self.entry.delete(0, tk.END)
-
-    def clear_all(self):
-        self.clear_entry()
-        self.history_label.config(text="")
-
-    def backspace(self):
-        self.current_input = self.current_input[:-1]
-        self.entry.delete(0, tk.END)
-        self.entry.insert(tk.END, self.current_input)
-
-    def toggle_sign(self):
-        if self.current_input:
-            try:
-                self.current_input = str(-float(self.current_input))
-                self.entry.delete(0, tk.END)
-                self.entry.insert(tk.END, self.current_input)
-            except Exception:
-                self.entry.delete(0, tk.END)
-                self.entry.insert(tk.END, "Error")
-
-    def square_root(self):
-        self.calculate_operation(sqrt)
-
-    def absolute_value(self):
-        self.calculate_operation(abs)
-
-    def log_base_10(self):
-        self.calculate_operation(log10)
-
-    def natural_log(self):
-        self.calculate_operation(log)
-
-    def trigonometric_function(self, func):
-        operations = {"sin": sin, "cos": cos, "tan": tan}
-        self.calculate_operation(operations[func])
-
-    def calculate_operation(self, operation):
-        try:
-            result = operation(float(self.current_input))
-            self.current_input = str(result)
-            self.entry.delete(0, tk.END)
-            self.entry.insert(tk.END, self.current_input)
-        except Exception:
-            self.entry.delete(0, tk.END)
-            self.entry.insert(tk.END, "Error")
-
-    def calculate_result(self):
-        try:
-            result = eval(self.current_input)
-            self.history.append(f"{self.current_input} = {result}")
-            self.current_input = str(result)
-            self.entry.delete(0, tk.END)
-            self.entry.insert(tk.END, self.current_input)
-        except Exception:
-            self.entry.delete(0, tk.END)
-            self.entry.insert(tk.END, "Error")
+        self.entry.insert(tk.END, self.calc.display_text())
 
 if __name__ == "__main__":
+    args = sys.argv[1:]
+    profiler = None
+    if "--profile-startup" in args or "--exit-after-startup" in args:
+        profiler = StartupProfiler(STARTED)
+        profiler.mark("import")
+    if "--lazy-scientific" in args:
+        scientific = "idle"
+    elif "--more-toggle" in args:
+        scientific = "toggle"
+    else:
+        scientific = "eager"
     root = tk.Tk()
-    app = NeonCalculator(root)
+    app = NeonCalculator(root, scientific=scientific, profiler=profiler)
+    if "--exit-after-startup" in args:
+        profiler.on_finish.append(lambda p: root.destroy())
     root.mainloop()
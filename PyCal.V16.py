@@ -1,5 +1,67 @@
+import time
+STARTED = time.perf_counter()  # --profile-startup times the imports from here.
+import os
+import sys
 import tkinter as tk
-from math import sqrt, log, log10, sin, cos, tan, pi, e
+from pycal.bulkinput import InputRejected, normalize_input
+from pycal.commands import MacroRecorder, replay
+from pycal.display import DisplayScheduler
+from pycal.core import Calculator, ExpressionTooLarge, KEY_CHARACTERS, OPERATION_KEYS, guarded_job
+from pycal.historylog import HistoryLog
+from pycal.preview import IncrementalParser
+from pycal.render import rounded_rect_image, scale_font
+from pycal.resize import ResizeCoalescer
+from pycal.startup import StartupProfiler, after_first_paint
+from pycal.watchdog import StallWatchdog
+from pycal.stats import OperationStats
+# The history window, canvas keypad, latency tracer, memory profiler and
+# worker processes are imported where they are first used, so they do not
+# add to startup when they are off.
+
+# How often a running background evaluation is polled from the Tk event loop.
+POLL_INTERVAL_MS = 20
+# Where the persistent history is kept, and how often it is written to disk.
+HISTORY_DIR = os.environ.get("PYCAL_HOME", os.path.join(os.path.expanduser("~"), ".pycal"))
+HISTORY_FLUSH_MS = 2000
+# Search in the history window: results shown, typing pause, indexing slice size.
+SEARCH_LIMIT = 10000
+SEARCH_DELAY_MS = 120
+INDEX_SLICE = 20000
+# Quiet period after the last edit before the live preview is recomputed.
+PREVIEW_DELAY_MS = 60
+# Commands that control macros and windows; they are never recorded into a macro.
+MACRO_CONTROLS = {"Record", "Replay", "Replay history", "History", "Paste",
+                  "Diagnostics", "Dump latency", "Export stats"}
+# Number of history results the macro is applied to by "Replay history".
+MACRO_HISTORY_COUNT = 50
+# The first rows of the keypad hold the memory, log and trigonometric keys.
+SCIENTIFIC_ROWS = 3
+# Refresh interval of the latency overlay, and where --trace-latency dumps to by default.
+OVERLAY_REFRESH_MS = 500
+LATENCY_FILE = os.path.join(HISTORY_DIR, "latency.json")
+# Main-thread stalls are logged here unless --no-watchdog is given.
+STALL_LOG = os.path.join(HISTORY_DIR, "stalls.log")
+# Operation counters are written here on F7 and on exit (.json for JSON, else Prometheus text).
+STATS_FILE = os.path.join(HISTORY_DIR, "stats.prom")
+# --memory-profile appends a tracemalloc report here every MEMORY_SAMPLE_MS.
+MEMORY_PROFILE_FILE = os.path.join(HISTORY_DIR, "memory.log")
+MEMORY_SAMPLE_MS = 10 * 60 * 1000
+# Keypad commands with their own counter: label -> (operation, function).
+COUNTED_COMMANDS = {
+    "=": ("calculate_result", ""),
+    "√": ("calculate_operation", "sqrt"),
+    "|x|": ("calculate_operation", "abs"),
+    "log": ("calculate_operation", "log10"),
+    "ln": ("calculate_operation", "ln"),
+    "sin": ("trigonometric_function", "sin"),
+    "cos": ("trigonometric_function", "cos"),
+    "tan": ("trigonometric_function", "tan"),
+    "MC": ("memory", "clear"),
+    "MR": ("memory", "recall"),
+    "M+": ("memory", "add"),
+    "M-": ("memory", "subtract"),
+    "History": ("history", "show"),
+}
 
 def get_button_colors(label):
     """
@@ -22,6 +84,8 @@ class NeonButton(tk.Canvas):
     """
     A custom canvas-based button that displays a rounded rectangle with a dark grey fill 
     and a neon-coloured frame (outline). The button lightens slightly when hovered.
+    The artwork for each state comes from a shared image cache, so hovering only
+    swaps the image of a single canvas item.
     """
     def __init__(self, master, text, command,
                  width=80, height=80, corner_radius=20,
@@ -37,50 +101,47 @@ class NeonButton(tk.Canvas):
         self.corner_radius = corner_radius
         self.frame_color = frame_color
         self.font = font
+        self.base_font = font
+        self.base_size = (width, height)
 
         # Set fill colours for normal and hover states.
         self.normal_fill = "#111111"  # Darker grey fill
         self.hover_fill = "#222222"   # Lighter grey on hover
         self.current_fill = self.normal_fill
 
+        self.image_item = None
+        self.text_item = None
         self.draw_button()
         # Bind mouse events for click and hover.
         self.bind("<Button-1>", lambda e: self.command())
         self.bind("<Enter>", self.on_enter)
         self.bind("<Leave>", self.on_leave)
 
+    def button_image(self, fill):
+        return rounded_rect_image(self, self.width, self.height, self.corner_radius,
+                                  fill=fill, outline=self.frame_color, border=3, bg=self['bg'])
+
     def draw_button(self):
-        """Draws the button with the current fill and neon frame."""
-        self.delete("all")
-        self.create_round_rect(
-            2, 2, self.width - 2, self.height - 2,
-            r=self.corner_radius,
-            fill=self.current_fill,
-            outline=self.frame_color,
-            width=3
-        )
-        self.create_text(self.width / 2, self.height / 2,
-                         text=self.text, font=self.font, fill="#FFFFFF")
+        """Shows the artwork for the current fill; items are only created once."""
+        image = self.button_image(self.current_fill)
+        if self.image_item is None:
+            self.image_item = self.create_image(0, 0, anchor=tk.NW, image=image)
+            self.text_item = self.create_text(self.width / 2, self.height / 2,
+                                              text=self.text, font=self.font, fill="#FFFFFF")
+        else:
+            self.itemconfig(self.image_item, image=image)
 
-    def create_round_rect(self, x1, y1, x2, y2, r=25, **kwargs):
-        """
-        Draw a rounded rectangle using a smooth polygon.
-        """
-        points = [
-            x1 + r, y1,
-            x2 - r, y1,
-            x2, y1,
-            x2, y1 + r,
-            x2, y2 - r,
-            x2, y2,
-            x2 - r, y2,
-            x1 + r, y2,
-            x1, y2,
-            x1, y2 - r,
-            x1, y1 + r,
-            x1, y1
-        ]
-        return self.create_polygon(points, smooth=True, **kwargs)
+    def resize(self, width, height):
+        """Redraw the button at a new size, scaling its label with it."""
+        if (width, height) == (self.width, self.height):
+            return
+        self.width, self.height = width, height
+        self.font = scale_font(self.base_font, min(width / self.base_size[0],
+                                                   height / self.base_size[1]))
+        self.config(width=width, height=height)
+        self.itemconfig(self.image_item, image=self.button_image(self.current_fill))
+        self.coords(self.text_item, width / 2, height / 2)
+        self.itemconfig(self.text_item, font=self.font)
 
     def on_enter(self, event):
         """Lighten the button fill when the cursor enters."""
@@ -93,29 +154,105 @@ class NeonButton(tk.Canvas):
         self.draw_button()
 
 class NeonCalculator:
-    def __init__(self, root):
+    def __init__(self, root, keypad="widgets", scientific="eager", profiler=None,
+                 latency_file=None, stall_log=None, stats_file=STATS_FILE):
+        """
+        keypad is "widgets" (one NeonButton per label) or "canvas" (one shared canvas).
+        With the widget keypad, scientific decides when the memory/log/trig rows
+        are built: "eager" with the rest, "idle" right after the first frame is
+        painted, or "toggle" when the "More" control is first opened.
+        profiler is an optional StartupProfiler that is marked and finished here.
+        latency_file turns on latency tracing; F12 shows the histograms and F8
+        (or closing the window) writes them to that file.
+        stall_log starts a watchdog that logs event-loop stalls to that file.
+        Operation counters are always kept and exported to stats_file.
+        """
         self.root = root
         self.root.title("Gamer Neon Calculator")
         self.root.geometry("550x850")
         self.root.configure(bg="#121212")
-        self.current_input = ""
-        self.memory = 0
-        self.history = []
+        # Input, memory and in-memory history; this class only adds the GUI.
+        self.calc = Calculator()
+        self.history = self.calc.history
+        try:
+            self.history_log = HistoryLog(HISTORY_DIR)
+        except OSError:
+            self.history_log = None  # Read-only home, or open in another window: session history only.
+        self.history_window = None
+        self.history_index = None  # Built when the history window is first opened.
+        self.index_after_id = None
+        self.search_after_id = None
+        self.search_partial = False  # The results shown were found in a partial index.
+        self.history_rows = None  # Entry ids shown in the history window; None for all.
+        self.job = None  # Background evaluation started by calculate_result.
+        self.preview_parser = IncrementalParser()
+        self.preview_start = 0      # Lowest input index edited since the last preview.
+        self.preview_after_id = None
+        self.key_run = []  # Typed characters not yet applied to the buffer.
+        # Per-operation counters; error_count goes up with every "Error" shown.
+        self.stats = OperationStats()
+        self.stats_file = stats_file
+        self.error_count = 0
+        self.job_started = 0
+        self.run_search = self.counted("history", "search", self.run_search)
+        self.latency_file = latency_file
+        self.tracer = None
+        if latency_file is not None:
+            from pycal.latency import LatencyTracer
+            self.tracer = LatencyTracer(root, pending=lambda: bool(self.key_run) or self.display.scheduled)
+        self.overlay = None
+        self.overlay_after_id = None
+        self.watchdog = None
+        if stall_log is not None:
+            self.watchdog = StallWatchdog(root, stall_log).start()
+        self.commands = self.build_commands()
+        self.macro = MacroRecorder()
 
         # Display area for the current input/result.
         self.entry = tk.Entry(root, font=("Helvetica Neue", 32, "bold"), justify="right", bd=0,
                               relief=tk.FLAT, bg="#1E1E1E", fg="#00E5FF", insertbackground="#00E5FF")
         self.entry.pack(fill=tk.BOTH, ipadx=10, ipady=20, padx=20, pady=(20, 10))
+
+        # Live preview of the value being typed.
+        self.preview_label = tk.Label(root, text="", font=("Helvetica Neue", 16), bg="#121212",
+                                      fg="#607D8B", anchor="e")
+        self.preview_label.pack(fill=tk.BOTH, padx=20, pady=(0, 5))
         
         # History label.
         self.history_label = tk.Label(root, text="", font=("Helvetica Neue", 12), bg="#121212", fg="#80DEEA", 
                                       anchor="e", justify="right")
         self.history_label.pack(fill=tk.BOTH, padx=20, pady=(0, 10))
+        self.history_label.bind("<Button-1>", lambda e: self.on_button_click("History"))
+
+        # All writes to the entry and history label are batched into one flush per idle cycle.
+        self.display = DisplayScheduler(self.entry, self.calc.buffer.text, self.history_label)
+
+        # Status line shown while an evaluation runs in the background.
+        self.status_frame = tk.Frame(root, bg="#121212")
+        self.status_frame.pack(fill=tk.X, padx=20)
+        self.status_label = tk.Label(self.status_frame, text="", font=("Helvetica Neue", 12),
+                                     bg="#121212", fg="#FFD600", anchor="e")
+        self.status_label.pack(side=tk.LEFT, expand=True, fill=tk.X)
+        self.cancel_button = tk.Button(self.status_frame, text="Cancel", font=("Helvetica Neue", 12),
+                                       bg="#222222", fg="#FF3D00", bd=0, relief=tk.FLAT,
+                                       activebackground="#333333", command=self.cancel_calculation)
         
         # Button grid frame.
         self.button_frame = tk.Frame(root, bg="#121212")
         self.button_frame.pack(expand=True, fill=tk.BOTH, padx=20, pady=10)
 
+        if keypad == "canvas":
+            scientific = "eager"  # The canvas keypad draws all rows at once.
+        self.scientific = scientific
+        self.profiler = profiler
+        # Shows and hides the scientific rows in "toggle" mode.
+        self.more_label = None
+        if scientific == "toggle":
+            self.more_label = tk.Label(self.status_frame, text="More ▾", font=("Helvetica Neue", 12),
+                                       bg="#121212", fg="#80DEEA", cursor="hand2")
+            self.more_label.pack(side=tk.LEFT, before=self.status_label)
+            self.more_label.bind("<Button-1>", lambda e: self.toggle_scientific_rows())
+
         # Define the layout for all buttons.
         buttons = [
             ("MC", "MR", "M+", "M-", "C"),
@@ -127,146 +264,625 @@ class NeonCalculator:
             ("0", ".", "±", "+", "⌫"),
         ]
 
-        # Create a NeonButton for each label.
-        for i, row in enumerate(buttons):
+        self.deferred_rows = None  # Scientific rows not built yet.
+        if keypad == "canvas":
+            self.build_canvas_keypad(buttons)
+        elif scientific == "eager":
+            self.build_widget_keypad(buttons)
+        else:
+            # Paint the basic keypad first and add the scientific rows later.
+            self.build_widget_keypad(buttons[SCIENTIFIC_ROWS:], first_row=SCIENTIFIC_ROWS)
+            self.deferred_rows = buttons[:SCIENTIFIC_ROWS]
+
+        self.root.bind("<Key>", self.on_key_press)
+        self.root.bind("<<Paste>>", self.paste_clipboard)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        if self.history_log is not None:
+            self.root.after(HISTORY_FLUSH_MS, self.flush_history)
+
+        if profiler is not None:
+            profiler.mark("widgets")
+        if profiler is not None or scientific == "idle":
+            after_first_paint(self.entry, self.on_first_paint)
+
+    def on_first_paint(self):
+        """Runs once, when the first frame is on screen."""
+        if self.profiler is not None:
+            self.profiler.mark("first paint")
+        if self.scientific == "idle":
+            self.show_scientific_rows()
+            if self.profiler is not None:
+                self.profiler.mark("scientific rows")
+        if self.profiler is not None:
+            self.profiler.finish()
+
+    def build_widget_keypad(self, buttons, first_row=0):
+        """One NeonButton canvas per label, laid out with grid from grid row first_row."""
+        self.keypad_rows = {}      # grid row -> NeonButtons in that row
+        self.hidden_rows = set()
+        self.button_size = (80, 80)
+        self.add_button_rows(buttons, first_row)
+        for j in range(len(buttons[0])):
+            self.button_frame.grid_columnconfigure(j, weight=1)
+
+        # Scale the artwork with the window once a resize has settled.
+        self.resizer = ResizeCoalescer(self.button_frame, self.fit_buttons)
+
+    def add_button_rows(self, buttons, first_row):
+        for i, row in enumerate(buttons, first_row):
+            widgets = []
             for j, text in enumerate(row):
                 frame_color, _ = get_button_colors(text)
                 btn = NeonButton(
                     self.button_frame,
                     text=text,
                     command=lambda t=text: self.on_button_click(t),
-                    width=80, height=80, corner_radius=15,
+                    width=self.button_size[0], height=self.button_size[1], corner_radius=15,
                     frame_color=frame_color,
                     font=("Helvetica Neue", 16, "bold")
                 )
                 btn.grid(row=i, column=j, padx=8, pady=8, sticky="nsew")
-
-        # Ensure the grid expands evenly.
-        for i in range(len(buttons)):
+                widgets.append(btn)
+            self.keypad_rows[i] = widgets
+            # Ensure the grid expands evenly.
             self.button_frame.grid_rowconfigure(i, weight=1)
-        for j in range(len(buttons[0])):
-            self.button_frame.grid_columnconfigure(j, weight=1)
 
-        self.root.bind("<Key>", self.on_key_press)
+    def fit_buttons(self, width, height):
+        rows = len(self.keypad_rows) - len(self.hidden_rows)
+        columns = max(len(widgets) for widgets in self.keypad_rows.values())
+        button_width = max(width // columns - 16, 1)
+        button_height = max(height // rows - 16, 1)
+        self.button_size = (button_width, button_height)
+        for widgets in self.keypad_rows.values():
+            for btn in widgets:
+                btn.resize(button_width, button_height)
+
+    def refit_buttons(self):
+        """Fit the buttons to the frame again after rows were added, shown or hidden."""
+        if self.resizer.size is not None:
+            self.fit_buttons(*self.resizer.size)
+
+    def show_scientific_rows(self, show=True):
+        """Show (building them if needed) or hide the scientific rows."""
+        if self.deferred_rows is not None:
+            self.add_button_rows(self.deferred_rows, 0)
+            self.deferred_rows = None
+        for i in range(SCIENTIFIC_ROWS):
+            for btn in self.keypad_rows[i]:
+                if show:
+                    btn.grid()
+                else:
+                    btn.grid_remove()
+            self.button_frame.grid_rowconfigure(i, weight=1 if show else 0)
+            if show:
+                self.hidden_rows.discard(i)
+            else:
+                self.hidden_rows.add(i)
+        if self.more_label is not None:
+            self.more_label.config(text="Less ▴" if show else "More ▾")
+        self.refit_buttons()
+
+    def toggle_scientific_rows(self):
+        hidden = self.deferred_rows is not None or bool(self.hidden_rows)
+        self.show_scientific_rows(hidden)
+
+    def build_canvas_keypad(self, buttons):
+        """The whole keypad drawn on a single canvas with grid hit-testing."""
+        from pycal.keypad import CanvasKeypad
+        self.keypad = CanvasKeypad(
+            self.button_frame, buttons, self.on_button_click,
+            frame_color=lambda label: get_button_colors(label)[0],
+            button_width=80, button_height=80, padding=8, corner_radius=15,
+            font=("Helvetica Neue", 16, "bold")
+        )
+        self.keypad.pack(expand=True, fill=tk.BOTH)
+        self.resizer = ResizeCoalescer(self.keypad, self.keypad.resize)
 
     def on_button_click(self, text):
-        if text == "=":
-            self.calculate_result()
-        elif text == "C":
-            self.clear_entry()
-        elif text == "AC":
-            self.clear_all()
-        elif text == "⌫":
-            self.backspace()
-        elif text == "±":
-            self.toggle_sign()
-        elif text == "√":
-            self.square_root()
-        elif text == "^":
-            self.update_entry("**")
-        elif text == "|x|":
-            self.absolute_value()
-        elif text == "log":
-            self.log_base_10()
-        elif text == "ln":
-            self.natural_log()
-        elif text in {"sin", "cos", "tan"}:
-            self.trigonometric_function(text)
-        elif text == "π":
-            self.update_entry(str(pi))
-        elif text == "e":
-            self.update_entry(str(e))
-        else:
-            self.update_entry(text)
+        traced = self.tracer is not None and self.tracer.begin(text)
+        try:
+            self.run_command(text)
+        finally:
+            if traced:
+                self.tracer.handled()
+
+    def run_command(self, text):
+        if self.key_run:
+            self.flush_key_run()
+        if self.job is not None:
+            # Only clearing is accepted while a result is being computed.
+            if text in {"C", "AC"}:
+                self.cancel_calculation()
+            return
+        if text not in MACRO_CONTROLS:
+            self.macro.record(text)
+        self.commands.dispatch(text)
 
     def on_key_press(self, event):
         key = event.char
-        if key.isdigit() or key in "+-*/%().":
-            self.update_entry(key)
-        elif key == "\r":
-            self.calculate_result()
-        elif key == "\x08":
-            self.backspace()
+        if self.job is not None:
+            if key == "\x1b":  # Escape key
+                self.cancel_calculation()
+            return
+        if key and key in KEY_CHARACTERS:
+            # Typed or scanned characters are collected and applied together
+            # once Tk has drained the pending key events.
+            traced = self.tracer is not None and self.tracer.begin(key)
+            if not self.key_run:
+                self.root.after_idle(self.flush_key_run)
+            self.key_run.append(key)
+            if traced:
+                self.tracer.handled()
+            return
+        label = self.commands.label_for_key(key) or self.commands.label_for_key(event.keysym)
+        if label is not None:
+            self.on_button_click(label)
+            return "break"
+
+    def build_commands(self):
+        """
+        Takes the Calculator's label table, with each of its commands wrapped
+        to update the display, and adds the commands that need the GUI.
+        """
+        commands = self.calc.commands
+        for label, handler in commands.handlers.items():
+            commands.handlers[label] = self.display_command(handler, label in OPERATION_KEYS)
+        commands.fallback = self.update_entry
+        commands.register("=", self.calculate_result, keys=("\r",))
+        commands.register("AC", self.clear_all)
+        commands.register("History", self.show_history)
+        commands.register("Paste", self.paste_clipboard, keys=("\x16",))  # Ctrl+V
+        commands.register("Record", self.toggle_recording, keys=("F9",))
+        commands.register("Replay", self.replay_macro, keys=("F10",))
+        commands.register("Replay history", self.replay_macro_over_history, keys=("F11",))
+        commands.register("Diagnostics", self.toggle_overlay, keys=("F12",))
+        commands.register("Dump latency", self.dump_latency, keys=("F8",))
+        commands.register("Export stats", self.export_stats, keys=("F7",))
+        for label, (operation, function) in COUNTED_COMMANDS.items():
+            commands.register(label, self.counted(operation, function, commands.handlers[label]))
+        return commands
+
+    def display_command(self, command, evaluates=False):
+        """
+        Wraps a Calculator command: the display is updated from the input index
+        it returns, or shows Error if it fails. evaluates counts its time as
+        evaluation in the latency trace.
+        """
+        def run():
+            started = time.perf_counter_ns()
+            try:
+                index = command()
+            except Exception:
+                self.show_error()
+                return
+            finally:
+                if evaluates:
+                    self.trace_eval(started)
+            if index is not None:
+                self.schedule_preview(index)
+                self.display.invalidate(index)
+        return run
+
+    def counted(self, operation, function, handler):
+        """Wraps handler so each call is added to the (operation, function) counter."""
+        counter = self.stats.counter(operation, function)
+
+        def run(*args):
+            errors = self.error_count
+            started = time.perf_counter_ns()
+            try:
+                return handler(*args)
+            finally:
+                counter.add(time.perf_counter_ns() - started, self.error_count != errors)
+        return run
+
+    def flush_key_run(self):
+        """Insert the collected keystrokes with a single buffer edit."""
+        if self.key_run:
+            run = "".join(self.key_run)
+            self.key_run.clear()
+            self.macro.record(run)
+            self.update_entry(run)
+
+    def paste_clipboard(self, event=None):
+        """Insert the whole clipboard at once, keeping only calculator input."""
+        try:
+            text = self.root.clipboard_get()
+        except tk.TclError:
+            return "break"  # Empty clipboard or no text on it.
+        self.insert_text(text)
+        return "break"
+
+    def insert_text(self, text):
+        """
+        Normalize a run of raw text (e.g. "2×3^2") and insert it as one edit.
+        Text that is not calculator input is refused, leaving the input as it was.
+        """
+        if self.job is not None:
+            return
+        if self.key_run:
+            self.flush_key_run()
+        try:
+            text = normalize_input(text)
+        except InputRejected as exc:
+            self.status_label.config(text=f"Paste rejected: {exc}")
+            return
+        if text:
+            self.macro.record(text)
+            self.update_entry(text)
+
+    def toggle_recording(self):
+        """Start recording a macro, or stop and keep the recording."""
+        if self.macro.is_recording:
+            macro = self.macro.stop()
+            self.status_label.config(text=f"Macro recorded ({len(macro)} steps, F10 to replay)")
+        else:
+            self.macro.start()
+            self.status_label.config(text="Recording macro… (F9 to stop)")
+
+    def replay_macro(self):
+        """Run the recorded macro on the current input."""
+        if self.macro.is_recording:
+            self.toggle_recording()
+        replay(self.macro.macro, self.on_button_click)
+
+    def replay_macro_over_history(self):
+        """
+        Run the recorded macro once for each of the last MACRO_HISTORY_COUNT
+        results, oldest first, e.g. to apply VAT to a series of amounts.
+        """
+        if self.macro.is_recording:
+            self.toggle_recording()
+        source = self.history_source()
+        total = len(source)
+        results = [source.entry(i)[1] for i in range(max(total - MACRO_HISTORY_COUNT, 0), total)]
+        for result in results:
+            if self.job is not None:
+                break  # A step went to a background evaluation; stop here.
+            self.current_input = result
+            replay(self.macro.macro, self.on_button_click)
+        self.refresh_entry()
+
+    @property
+    def current_input(self):
+        return self.calc.input
+
+    @current_input.setter
+    def current_input(self, text):
+        self.calc.input = text
+        self.schedule_preview(0)
+
+    def edit(self, command, *args):
+        """Run a Calculator editing command and redisplay from the index it returns."""
+        index = command(*args)
+        self.schedule_preview(index)
+        self.display.invalidate(index)
 
     def update_entry(self, text):
-        self.current_input += text
-        self.entry.delete(0, tk.END)
-        self.entry.insert(tk.END, self.current_input)
+        self.edit(self.calc.insert, text)
 
     def clear_entry(self):
-        self.current_input = ""
-        self.entry.delete(0, tk.END)
+        self.edit(self.calc.clear)
 
     def clear_all(self):
         self.clear_entry()
-        self.history_label.config(text="")
+        self.display.set_history("")
 
-    def backspace(self):
-        self.current_input = self.current_input[:-1]
-        self.entry.delete(0, tk.END)
-        self.entry.insert(tk.END, self.current_input)
-
-    def toggle_sign(self):
-        if self.current_input:
-            try:
-                self.current_input = str(-float(self.current_input))
-                self.entry.delete(0, tk.END)
-                self.entry.insert(tk.END, self.current_input)
-            except Exception:
-                self.entry.delete(0, tk.END)
-                self.entry.insert(tk.END, "Error")
+    def schedule_preview(self, start):
+        """
+        Note an edit from index start onwards and (re)start the preview timer,
+        so a burst of keystrokes leads to a single preview update.
+        """
+        self.preview_start = min(self.preview_start, start)
+        if self.preview_after_id is not None:
+            self.root.after_cancel(self.preview_after_id)
+        self.preview_after_id = self.root.after(PREVIEW_DELAY_MS, self.update_preview)
 
-    def square_root(self):
-        self.calculate_operation(sqrt)
+    def update_preview(self):
+        """Re-lex the edited tail of the input and show its value."""
+        self.preview_after_id = None
+        text = self.current_input
+        self.preview_parser.update(text, self.preview_start)
+        self.preview_start = len(text)
+        value = self.preview_parser.preview()
+        self.preview_label.config(text=f"= {value}" if value and value != text else "")
 
-    def absolute_value(self):
-        self.calculate_operation(abs)
+    def refresh_entry(self):
+        """Redisplay the whole input buffer on the next flush."""
+        self.display.invalidate(0)
 
-    def log_base_10(self):
-        self.calculate_operation(log10)
+    def show_error(self):
+        self.error_count += 1
+        self.display.show_message("Error")
 
-    def natural_log(self):
-        self.calculate_operation(log)
+    def trace_eval(self, started):
+        """Count the time since started (perf_counter_ns) as evaluation in the current trace."""
+        if self.tracer is not None:
+            self.tracer.add_eval(time.perf_counter_ns() - started)
 
-    def trigonometric_function(self, func):
+    def calculate_result(self):
         """
-        Calculate trigonometric functions using degrees.
-        The input is converted from degrees to radians before applying the function.
+        Evaluate the current input.
+        Cheap expressions are evaluated inline. Expensive ones, as judged by
+        the static cost estimate, run in a background process with CPU and
+        memory limits while the Tk main loop keeps running; hopeless ones are
+        rejected straight away.
         """
-        operations = {"sin": sin, "cos": cos, "tan": tan}
+        if self.job is not None:
+            return
+        self.status_label.config(text="")
+        started = time.perf_counter_ns()
         try:
-            angle_deg = float(self.current_input)
-            angle_rad = angle_deg * (pi / 180)
-            result = operations[func](angle_rad)
-            self.current_input = str(result)
-            self.entry.delete(0, tk.END)
-            self.entry.insert(tk.END, self.current_input)
+            expression, path = self.calc.compile()
+            from pycal.cost import INLINE  # Loaded by compile().
+            if path == INLINE:
+                result = str(expression())
+                self.trace_eval(started)
+                self.show_result(expression.source, result)
+                return
+        except ExpressionTooLarge as exc:
+            self.show_error()
+            self.status_label.config(text=str(exc))
+            return
         except Exception:
-            self.entry.delete(0, tk.END)
-            self.entry.insert(tk.END, "Error")
+            self.show_error()
+            return
+        self.job_started = time.perf_counter_ns()
+        self.job = guarded_job(expression).start()
+        self.set_computing(True)
+        self.root.after(POLL_INTERVAL_MS, self.poll_calculation)
 
-    def calculate_operation(self, operation):
+    def poll_calculation(self):
+        job = self.job
+        if job is None:
+            return  # Cancelled.
+        if not job.poll():
+            self.root.after(POLL_INTERVAL_MS, self.poll_calculation)
+            return
+        self.job = None
+        self.set_computing(False)
+        from pycal.worker import ResourceLimitError
+        errors = self.error_count
         try:
-            result = operation(float(self.current_input))
-            self.current_input = str(result)
-            self.entry.delete(0, tk.END)
-            self.entry.insert(tk.END, self.current_input)
+            self.show_result(job.expression, job.result())
+        except ResourceLimitError as exc:
+            self.show_error()
+            self.status_label.config(text=f"Stopped: {exc}")
         except Exception:
-            self.entry.delete(0, tk.END)
-            self.entry.insert(tk.END, "Error")
+            self.show_error()
+        self.stats.counter("guarded_evaluation").add(time.perf_counter_ns() - self.job_started,
+                                                     self.error_count != errors)
 
-    def calculate_result(self):
+    def show_result(self, expression, result):
+        """Record a finished calculation and display its result."""
+        self.calc.record(expression, result)
+        if self.history_log is not None:
+            try:
+                self.history_log.append(expression, result)  # Flushes when enough are queued.
+            except OSError as exc:
+                self.status_label.config(text=f"History not saved: {exc.strerror}")
+        if self.history_window is not None:
+            if self.index_after_id is None:
+                self.index_history()  # Indexes the new entry.
+            self.schedule_search()
+        self.schedule_preview(0)
+        self.refresh_entry()
+
+    def show_history(self):
+        # Display the last five calculations, including earlier sessions.
+        source = self.history_log if self.history_log is not None else self.history
+        self.display.set_history("\n".join(source.last(5)))
+        self.open_history_window()
+
+    def open_history_window(self):
+        """Open (or raise) the History window with its search box."""
+        if self.history_window is not None:
+            self.history_window.lift()
+            return
+        from pycal.historyview import VirtualListView
+        from pycal.search import HistoryIndex
+        window = tk.Toplevel(self.root, bg="#121212")
+        window.title("History")
+        window.geometry("420x500")
+        window.protocol("WM_DELETE_WINDOW", self.close_history_window)
+        self.search_var = tk.StringVar()
+        search = tk.Entry(window, textvariable=self.search_var, font=("Helvetica Neue", 14), bd=0,
+                          relief=tk.FLAT, bg="#1E1E1E", fg="#80DEEA", insertbackground="#80DEEA")
+        search.pack(fill=tk.X, padx=10, pady=10, ipady=6)
+        search.bind("<KeyRelease>", lambda e: self.schedule_search())
+        self.history_view = VirtualListView(window, self.history_row_text,
+                                            on_select=self.recall_history_row)
+        self.history_view.pack(expand=True, fill=tk.BOTH, padx=10, pady=(0, 10))
+        self.history_window = window
+        search.focus_set()
+        if self.history_log is not None and self.history_index is None:
+            self.history_index = HistoryIndex(self.history_log)
+        if self.index_after_id is None:
+            self.index_history()
+        self.run_search()
+
+    def close_history_window(self):
+        self.history_window.destroy()
+        self.history_window = None
+
+    def index_history(self):
+        """
+        Index the persistent history in slices so the window stays responsive.
+        A search made meanwhile covers the part indexed so far; it is run again
+        once the index is complete.
+        """
+        self.index_after_id = None
+        if self.history_index is None:
+            return
+        if not self.history_index.catch_up(INDEX_SLICE):
+            self.index_after_id = self.root.after(1, self.index_history)
+        elif self.search_partial:
+            self.run_search()
+
+    def schedule_search(self):
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(SEARCH_DELAY_MS, self.run_search)
+
+    def history_source(self):
+        return self.history_log if self.history_log is not None else self.history
+
+    def run_search(self):
+        """Show the history entries matching the search box, newest first."""
+        self.search_after_id = None
+        if self.history_window is None:
+            return
+        query = self.search_var.get().strip()
+        if not query:
+            self.history_rows = None  # Everything, newest first, without the index.
+            self.search_partial = False
+            self.history_view.set_count(len(self.history_source()))
+            return
+        if self.history_index is not None:
+            index = self.history_index
+        else:
+            # Without a log the session history is small enough to index afresh,
+            # which it has to be: once the ring buffer wraps its ids shift.
+            from pycal.search import HistoryIndex
+            index = HistoryIndex(self.history)
+            index.catch_up()
+        self.history_rows = index.search(query, SEARCH_LIMIT)
+        self.search_partial = len(index) < len(self.history_source())
+        self.history_view.set_count(len(self.history_rows))
+
+    def history_entry_id(self, row):
+        if self.history_rows is None:
+            return len(self.history_source()) - 1 - row
+        return self.history_rows[row]
+
+    def history_row_text(self, row):
+        return "%s = %s" % self.history_source().entry(self.history_entry_id(row))
+
+    def recall_history_row(self, row):
+        """Put the expression of a clicked history entry back into the input."""
+        if self.job is not None:
+            return
+        expression, _ = self.history_source().entry(self.history_entry_id(row))
+        self.current_input = expression
+        self.refresh_entry()
+
+    def flush_history(self):
+        """Write queued history entries to disk in one batch; on failure they are retried."""
         try:
-            result = eval(self.current_input)
-            self.history.append(f"{self.current_input} = {result}")
-            self.current_input = str(result)
-            self.entry.delete(0, tk.END)
-            self.entry.insert(tk.END, self.current_input)
-        except Exception:
-            self.entry.delete(0, tk.END)
-            self.entry.insert(tk.END, "Error")
+            self.history_log.flush()
+        except OSError as exc:
+            self.status_label.config(text=f"History not saved: {exc.strerror}")
+        self.root.after(HISTORY_FLUSH_MS, self.flush_history)
+
+    def toggle_overlay(self):
+        """Show or hide the latency histograms over the window."""
+        if self.tracer is None:
+            return
+        if self.overlay is not None:
+            self.root.after_cancel(self.overlay_after_id)
+            self.overlay.destroy()
+            self.overlay = None
+            return
+        self.overlay = tk.Label(self.root, font=("Courier", 10), bg="#000000", fg="#00E676",
+                                anchor="nw", justify="left")
+        self.overlay.place(x=0, y=0, relwidth=1)
+        self.refresh_overlay()
+
+    def refresh_overlay(self):
+        self.overlay.config(text="\n".join(self.tracer.summary_lines()))
+        self.overlay_after_id = self.root.after(OVERLAY_REFRESH_MS, self.refresh_overlay)
+
+    def dump_latency(self):
+        if self.tracer is None:
+            return
+        try:
+            self.tracer.dump(self.latency_file)
+        except OSError as exc:
+            self.status_label.config(text=f"Latency dump failed: {exc.strerror}")
+        else:
+            self.status_label.config(text=f"Latency written to {self.latency_file}")
+
+    def export_stats(self):
+        try:
+            self.stats.export(self.stats_file)
+        except OSError as exc:
+            self.status_label.config(text=f"Stats export failed: {exc.strerror}")
+        else:
+            self.status_label.config(text=f"Stats written to {self.stats_file}")
+
+    def on_close(self):
+        self.cancel_calculation()
+        try:
+            self.stats.export(self.stats_file)
+        except OSError:
+            pass  # As with the latency dump, closing must not fail over diagnostics.
+        if self.watchdog is not None:
+            self.watchdog.stop()
+        if self.tracer is not None:
+            try:
+                self.tracer.dump(self.latency_file)
+            except OSError:
+                pass  # Closing must not fail because the dump could not be written.
+        if self.history_log is not None:
+            try:
+                self.history_log.close()
+            except OSError:
+                pass  # The last entries could not be written; still close the window.
+        self.root.destroy()
+
+    def cancel_calculation(self):
+        """Abort a running background evaluation and keep the input."""
+        if self.job is not None:
+            self.job.cancel()
+            self.job = None
+            self.set_computing(False)
+
+    def set_computing(self, computing):
+        """Show or hide the "Computing…" state and its cancel control."""
+        if computing:
+            self.status_label.config(text="Computing… (Esc to cancel)")
+            self.cancel_button.pack(side=tk.RIGHT, padx=(10, 0))
+        else:
+            self.status_label.config(text="")
+            self.cancel_button.pack_forget()
 
 if __name__ == "__main__":
+    args = sys.argv[1:]
+    profiler = None
+    if "--profile-startup" in args or "--exit-after-startup" in args:
+        profiler = StartupProfiler(STARTED)
+        profiler.mark("import")
+    if "--lazy-scientific" in args:
+        scientific = "idle"
+    elif "--more-toggle" in args:
+        scientific = "toggle"
+    else:
+        scientific = "eager"
+    latency_file = None
+    for arg in args:
+        if arg == "--trace-latency":
+            latency_file = LATENCY_FILE
+        elif arg.startswith("--trace-latency="):
+            latency_file = arg.split("=", 1)[1]
+    stall_log = None if "--no-watchdog" in args else STALL_LOG
+    stats_file = STATS_FILE
+    for arg in args:
+        if arg.startswith("--stats="):
+            stats_file = arg.split("=", 1)[1]
+    memory_file = None
+    for arg in args:
+        if arg == "--memory-profile":
+            memory_file = MEMORY_PROFILE_FILE
+        elif arg.startswith("--memory-profile="):
+            memory_file = arg.split("=", 1)[1]
     root = tk.Tk()
-    app = NeonCalculator(root)
+    app = NeonCalculator(root, keypad="canvas" if "--canvas-keypad" in args else "widgets",
+                         scientific=scientific, profiler=profiler, latency_file=latency_file,
+                         stall_log=stall_log, stats_file=stats_file)
+    if memory_file is not None:
+        from pycal.memprofile import MemoryProfiler
+        os.makedirs(os.path.dirname(os.path.abspath(memory_file)), exist_ok=True)
+        MemoryProfiler(root, memory_file, interval_ms=MEMORY_SAMPLE_MS).start()
+    if "--exit-after-startup" in args:
+        profiler.on_finish.append(lambda p: app.on_close())
     root.mainloop()
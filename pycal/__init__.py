@@ -0,0 +1,6 @@
+"""
+PyCal core package.
+
+Non-GUI building blocks shared by the PyCal.Vxx.py front ends. Submodules are
+imported on demand, so importing the package itself stays cheap.
+"""
@@ -0,0 +1,224 @@
+"""
+Headless batch evaluation.
+
+Reads expressions one per line from files or stdin and streams one result per
+line to stdout or an output file. Each stage is a generator, so memory use does
+not depend on the size of the input.
+
+A line is either an expression, evaluated like pressing "=", or a key name
+followed by its operand, evaluated like typing the operand and pressing that
+key (trigonometric keys work in degrees):
+
+    (1+2)*3        ->  9
+    sqrt 16        ->  4.0
+    sin 30         ->  0.49999999999999994
+
+Lines that fail produce "Error", exactly like the calculator display.
+Expressions go through the same static cost estimate as "=": expensive ones
+are evaluated in a child process with the calculator's CPU and memory limits,
+and ones whose result would be too large to show are rejected with "Error"
+without being evaluated.
+
+With --workers the input is split into chunks that are evaluated by a
+process pool. Results are still written in input order, and only a bounded
+number of chunks is in flight at any time.
+
+Usage:
+    python -m pycal.batch [-o OUTPUT] [--echo] [-j [N]] [--chunk-size N] [FILE ...]
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+
+from pycal.core import compile_input, evaluate_compiled
+from pycal.engine import apply_operation, operation_names
+
+ERROR = "Error"
+
+# Default number of lines per chunk in process-pool mode.
+DEFAULT_CHUNK_SIZE = 2000
+
+# Keypad labels that name the same operation as the batch keywords.
+_KEY_ALIASES = {"√": "sqrt", "|x|": "abs"}
+
+_operation_key_set = None
+
+
+def _operation_keys():
+    global _operation_key_set
+    if _operation_key_set is None:
+        _operation_key_set = frozenset(operation_names())
+    return _operation_key_set
+
+
+def evaluate_line(line):
+    """Returns the display text the calculator would show for one input line."""
+    name, _, operand = line.strip().partition(" ")
+    name = _KEY_ALIASES.get(name, name)
+    try:
+        if operand and name in _operation_keys():
+            return str(apply_operation(name, operand))
+        return evaluate_compiled(*compile_input(line))
+    except Exception:
+        return ERROR
+
+
+def read_lines(paths):
+    """Yields input lines without their line terminator."""
+    if not paths:
+        paths = ["-"]
+    for path in paths:
+        if path == "-":
+            stream = sys.stdin
+        else:
+            stream = open(path, encoding="utf-8")
+        try:
+            for line in stream:
+                yield line.rstrip("\r\n")
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+
+def evaluate_lines(lines, echo=False):
+    """Yields one output line per input line."""
+    for line in lines:
+        result = evaluate_line(line)
+        yield f"{line} = {result}" if echo else result
+
+
+def chunked(lines, size):
+    """Groups lines into lists of at most size lines."""
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def evaluate_chunk(chunk):
+    """Evaluates one chunk in a worker process."""
+    return [evaluate_line(line) for line in chunk]
+
+
+def evaluate_lines_parallel(lines, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, echo=False):
+    """
+    Yields one output line per input line, evaluating chunks on a process pool.
+    A chunk that fails as a whole (for example because its worker died) is
+    reported on stderr and yields "Error" for each of its lines; the remaining
+    chunks are unaffected.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+
+    workers = workers or os.cpu_count() or 1
+    max_pending = workers * 2
+    pool = ProcessPoolExecutor(workers)
+    pending = deque()
+    first_line = 1
+
+    def drain():
+        nonlocal pool
+        start, chunk, future = pending.popleft()
+        try:
+            results = future.result()
+        except Exception as exc:
+            print(f"chunk at lines {start}-{start + len(chunk) - 1} failed: {exc!r}",
+                  file=sys.stderr)
+            results = [ERROR] * len(chunk)
+            if isinstance(exc, BrokenProcessPool):
+                # Replace the pool and resubmit the chunks that were lost with it.
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = ProcessPoolExecutor(workers)
+                for i, (s, c, _) in enumerate(pending):
+                    pending[i] = (s, c, pool.submit(evaluate_chunk, c))
+        if echo:
+            return [f"{line} = {result}" for line, result in zip(chunk, results)]
+        return results
+
+    finished = False
+    try:
+        for chunk in chunked(lines, chunk_size):
+            pending.append((first_line, chunk, pool.submit(evaluate_chunk, chunk)))
+            first_line += len(chunk)
+            if len(pending) >= max_pending:
+                yield from drain()
+        while pending:
+            yield from drain()
+        finished = True
+    finally:
+        # After a normal run the workers are idle and are joined, so the pool is
+        # torn down before interpreter shutdown; on an error or an abandoned
+        # generator the outstanding chunks are dropped instead.
+        pool.shutdown(wait=finished, cancel_futures=not finished)
+
+
+def write_lines(results, stream):
+    """Writes results to stream and returns the number of lines written."""
+    count = 0
+    write = stream.write
+    for result in results:
+        write(result)
+        write("\n")
+        count += 1
+    return count
+
+
+def report_throughput(count, elapsed, stream=None):
+    """Prints the line count and lines per second."""
+    stream = stream or sys.stderr
+    rate = count / elapsed if elapsed > 0 else float("inf")
+    print(f"{count} lines in {elapsed:.3f}s ({rate:,.0f} lines/s)", file=stream)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m pycal.batch",
+        description="Evaluate calculator expressions, one per line.")
+    parser.add_argument("files", nargs="*", metavar="FILE",
+                        help="input files, '-' for stdin (default: stdin)")
+    parser.add_argument("-o", "--output", metavar="OUTPUT",
+                        help="write results to OUTPUT instead of stdout")
+    parser.add_argument("--echo", action="store_true",
+                        help="write 'expression = result' like the history view")
+    parser.add_argument("-j", "--workers", type=int, nargs="?", const=0, default=None,
+                        metavar="N",
+                        help="evaluate on N worker processes (all cores if N is omitted)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, metavar="N",
+                        help=f"lines per worker chunk (default: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="do not report throughput on stderr")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    lines = read_lines(args.files)
+    if args.workers is None:
+        results = evaluate_lines(lines, args.echo)
+    else:
+        results = evaluate_lines_parallel(lines, args.workers, args.chunk_size, args.echo)
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    start = time.perf_counter()
+    try:
+        count = write_lines(results, output)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        else:
+            output.flush()
+    if not args.quiet:
+        report_throughput(count, time.perf_counter() - start)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,405 @@
+"""
+Benchmark suite for the PyCal.Vxx.py front ends.
+
+    python -m pycal.benchmark [--format json|csv] [-o OUTPUT] [--repeat N]
+                              [--timeout SECONDS] [--case NAME]... [FILE...]
+
+Every version file (all PyCal.V*.py next to the package by default) is loaded
+with importlib in a fresh subprocess, once per benchmark case, so a version
+that hangs on an adversarial expression only loses that one measurement to
+the timeout. The cases are:
+
+    construct        building the calculator window
+    eval:realistic   calculate_result over everyday expressions
+    eval:<name>      calculate_result on one adversarial expression each
+    keystrokes       a typing stream through update_entry and backspace
+    hover            NeonButton enter/leave redraw cycles
+
+Each operation is followed by update_idletasks(), so deferred redraws are
+included. Results are microseconds per operation (median over --repeat runs)
+in a table of versions by cases; failures show as "timeout", "error" or
+"n/a". The windows need an X display: DISPLAY is used if it is set,
+otherwise a private Xvfb server is started for the run.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Everyday calculations, evaluated one after the other.
+REALISTIC = (
+    "12+7", "125.5*3", "(1+2)*3/4", "100*1.19", "2**10", "7%3", "1/3",
+    "3.14159*2.5**2", "((12.5+7.5)*4-10)/3", "1000000*1.000001",
+)
+
+# Inputs that have hung, crashed or slowed down earlier versions.
+ADVERSARIAL = {
+    "long_sum": "+".join(["1"] * 2000),
+    "deep_parens": "(" * 150 + "1" + ")" * 150,
+    "huge_power": "9**9**9",
+    "big_int": "2**100000",
+    "div_zero": "1/0",
+    "syntax": "2+*3)",
+    "float_overflow": "1e308*10",
+}
+
+# Typed in a loop; "⌫" stands for backspace.
+KEYSTROKES = "1234+5678*9⌫⌫-42.5/7⌫"
+KEYSTROKE_ROUNDS = 50
+HOVER_ROUNDS = 20
+
+CASES = ("construct", "eval:realistic") + tuple(f"eval:{name}" for name in ADVERSARIAL) + (
+    "keystrokes", "hover")
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_REPEAT = 5
+
+
+class NotApplicable(Exception):
+    """The version has nothing to measure for this case."""
+
+
+def version_files():
+    return sorted(ROOT.glob("PyCal.V*.py"))
+
+
+# Worker side: runs inside the subprocess.
+
+def load_version(path):
+    """Executes a version file as a module without entering its main loop."""
+    import importlib.util
+    import tkinter as tk
+    tk.Misc.mainloop = lambda self, n=0: None  # V01 builds and runs its window at import.
+    spec = importlib.util.spec_from_file_location("pycal_benchmark_target", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class AppTarget:
+    """Drives a version built around a calculator class (V02 onwards)."""
+
+    def __init__(self, module):
+        import tkinter as tk
+        classes = [obj for name, obj in vars(module).items()
+                   if isinstance(obj, type) and name.endswith("Calculator")
+                   and obj.__module__ == module.__name__]
+        self.module = module
+        self.root = tk.Tk()
+        self.app = classes[0](self.root)
+        self.root.update_idletasks()
+
+    def set_input(self, text):
+        if hasattr(self.app, "calc"):
+            self.app.calc.input = text
+        else:
+            self.app.current_input = text
+
+    def calculate(self):
+        app = self.app
+        if hasattr(app, "calculate_result"):
+            app.calculate_result()
+        else:
+            app.on_button_click("=")
+        # V16 hands expensive expressions to a worker process; wait for it.
+        job = getattr(app, "job", None)
+        if job is not None:
+            job.wait()
+            while app.job is not None:
+                self.root.update()
+        self.root.update_idletasks()
+
+    def type_key(self, key):
+        app = self.app
+        if key == "⌫":
+            if hasattr(app, "backspace"):
+                app.backspace()
+            else:
+                app.on_button_click("⌫")
+        elif hasattr(app, "update_entry"):
+            app.update_entry(key)
+        else:
+            app.on_button_click(key)
+        self.root.update_idletasks()
+
+    def clear(self):
+        self.set_input("")
+
+    def hover_buttons(self):
+        button_class = getattr(self.module, "NeonButton", None)
+        if button_class is None or not hasattr(button_class, "on_enter"):
+            raise NotApplicable("no NeonButton hover")
+        buttons = []
+        stack = [self.root]
+        while stack:
+            widget = stack.pop()
+            if isinstance(widget, button_class):
+                buttons.append(widget)
+            stack.extend(widget.winfo_children())
+        return buttons
+
+    def close(self):
+        if hasattr(self.app, "on_close"):
+            self.app.on_close()
+        else:
+            self.root.destroy()
+
+
+class ScriptTarget(AppTarget):
+    """Drives V01, a plain script with a button_click(event) callback."""
+
+    def __init__(self, module):
+        import tkinter as tk
+        self.module = module
+        self.root = module.root
+        self.entry = module.entry
+        self.buttons = {}
+        stack = [self.root]
+        while stack:
+            widget = stack.pop()
+            if isinstance(widget, tk.Button):
+                self.buttons[widget.cget("text")] = widget
+            stack.extend(widget.winfo_children())
+        self.root.update_idletasks()
+
+    def click(self, label):
+        from types import SimpleNamespace
+        self.module.button_click(SimpleNamespace(widget=self.buttons[label]))
+
+    def set_input(self, text):
+        self.entry.delete(0, "end")
+        self.entry.insert("end", text)
+
+    def calculate(self):
+        self.click("=")
+        self.root.update_idletasks()
+
+    def type_key(self, key):
+        if key not in self.buttons:
+            raise NotApplicable(f"no {key!r} key")
+        self.click(key)
+        self.root.update_idletasks()
+
+    def hover_buttons(self):
+        raise NotApplicable("no NeonButton hover")
+
+    def close(self):
+        self.root.destroy()
+
+
+def make_target(path):
+    module = load_version(path)
+    if hasattr(module, "button_click"):
+        return ScriptTarget(module)
+    return AppTarget(module)
+
+
+def run_case(path, case, repeat):
+    """Returns microseconds per operation (median of repeat runs) for one case."""
+    from statistics import median
+    timings = []
+    if case == "construct":
+        for _ in range(repeat):
+            start = time.perf_counter()
+            target = make_target(path)
+            timings.append(time.perf_counter() - start)
+            target.close()
+        return median(timings) * 1e6
+
+    target = make_target(path)
+    try:
+        if case == "eval:realistic":
+            def run():
+                for expression in REALISTIC:
+                    target.set_input(expression)
+                    target.calculate()
+                return len(REALISTIC)
+        elif case.startswith("eval:"):
+            expression = ADVERSARIAL[case[5:]]
+
+            def run():
+                target.set_input(expression)
+                target.calculate()
+                return 1
+        elif case == "keystrokes":
+            def run():
+                target.clear()
+                for _ in range(KEYSTROKE_ROUNDS):
+                    for key in KEYSTROKES:
+                        target.type_key(key)
+                return KEYSTROKE_ROUNDS * len(KEYSTROKES)
+        elif case == "hover":
+            buttons = target.hover_buttons()
+
+            def run():
+                for _ in range(HOVER_ROUNDS):
+                    for button in buttons:
+                        button.on_enter(None)
+                        button.update_idletasks()
+                        button.on_leave(None)
+                        button.update_idletasks()
+                return HOVER_ROUNDS * len(buttons) * 2
+        else:
+            raise ValueError(f"unknown case {case!r}")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            count = run()
+            timings.append((time.perf_counter() - start) / count)
+    finally:
+        target.close()
+    return median(timings) * 1e6
+
+
+def worker_main(path, case, repeat):
+    """Subprocess entry point: prints {"value": µs} or {"skip": reason} as JSON."""
+    try:
+        outcome = {"value": run_case(path, case, repeat)}
+    except NotApplicable as exc:
+        outcome = {"skip": str(exc)}
+    print(json.dumps(outcome), flush=True)
+    return 0
+
+
+# Controller side.
+
+@contextmanager
+def virtual_display():
+    """Yields a DISPLAY value, starting a private Xvfb server if none is set."""
+    if os.environ.get("DISPLAY"):
+        yield os.environ["DISPLAY"]
+        return
+    read_fd, write_fd = os.pipe()
+    try:
+        server = subprocess.Popen(
+            ["Xvfb", "-displayfd", str(write_fd), "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+            pass_fds=(write_fd,), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except FileNotFoundError:
+        os.close(read_fd)
+        raise SystemExit("pycal.benchmark: no X display; set DISPLAY or install Xvfb") from None
+    finally:
+        os.close(write_fd)
+    try:
+        with os.fdopen(read_fd) as f:
+            number = f.readline().strip()
+        if not number:
+            raise SystemExit("pycal.benchmark: Xvfb did not start")
+        yield f":{number}"
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def measure(path, case, repeat, timeout, env):
+    """Runs one case in a subprocess; returns µs per operation or a status string."""
+    command = [sys.executable, "-m", "pycal.benchmark", "--worker", str(path), case,
+               "--repeat", str(repeat)]
+    try:
+        done = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True,
+                              timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return "timeout"
+    if done.returncode != 0:
+        return "error"
+    try:
+        outcome = json.loads(done.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        return "error"
+    if "skip" in outcome:
+        return "n/a"
+    return round(outcome["value"], 3)
+
+
+def run_suite(files, cases, repeat, timeout, progress=None):
+    """Returns {version name: {case: µs or status}}."""
+    results = {}
+    with virtual_display() as display, tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, DISPLAY=display, PYCAL_HOME=home)
+        for path in files:
+            row = results[Path(path).name] = {}
+            for case in cases:
+                row[case] = measure(path, case, repeat, timeout, env)
+                if progress is not None:
+                    progress(Path(path).name, case, row[case])
+    return results
+
+
+def write_json(results, cases, output):
+    import platform
+    import tkinter
+    table = {
+        "unit": "microseconds per operation",
+        "python": platform.python_version(),
+        "tk": str(tkinter.TkVersion),
+        "cases": list(cases),
+        "results": results,
+    }
+    json.dump(table, output, indent=2)
+    output.write("\n")
+
+
+def write_csv(results, cases, output):
+    import csv
+    writer = csv.writer(output)
+    writer.writerow(["version"] + list(cases))
+    for version, row in results.items():
+        writer.writerow([version] + [row[case] for case in cases])
+
+
+def build_parser():
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog="python -m pycal.benchmark",
+        description="Benchmark PyCal versions and print a comparison table.")
+    parser.add_argument("files", nargs="*", metavar="FILE",
+                        help="version files (default: every PyCal.V*.py)")
+    parser.add_argument("--format", choices=("json", "csv"), default="json",
+                        help="table format (default: json)")
+    parser.add_argument("-o", "--output", metavar="OUTPUT",
+                        help="write the table to OUTPUT instead of stdout")
+    parser.add_argument("--case", action="append", choices=CASES, dest="cases", metavar="NAME",
+                        help="run only this case; may be repeated (default: all)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, metavar="N",
+                        help=f"runs per measurement, the median is reported (default: {DEFAULT_REPEAT})")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, metavar="SECONDS",
+                        help=f"limit per version and case (default: {DEFAULT_TIMEOUT:g})")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="do not report progress on stderr")
+    parser.add_argument("--worker", nargs=2, metavar=("FILE", "CASE"), help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    if args.worker:
+        return worker_main(args.worker[0], args.worker[1], args.repeat)
+    files = [Path(f).resolve() for f in args.files] or version_files()
+    cases = args.cases or CASES
+
+    def progress(version, case, value):
+        print(f"{version} {case}: {value}", file=sys.stderr, flush=True)
+
+    results = run_suite(files, cases, args.repeat, args.timeout,
+                        None if args.quiet else progress)
+    output = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        if args.format == "csv":
+            write_csv(results, cases, output)
+        else:
+            write_json(results, cases, output)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Editable input buffer for the calculator display.
+
+The buffer keeps its contents as a single str together with a cursor index,
+so text() costs nothing and the display can push the edited span straight
+from it. Inserting or deleting at the cursor builds the new string from the
+old one; at the end of the input, where typing and backspacing happen, that
+is a single concatenation or slice. Every edit method returns the lowest index
+it changed, which is where the display has to start redrawing.
+"""
+
+
+class InputBuffer:
+    """Text the user is editing, with an insertion point."""
+    __slots__ = ("_text", "_cursor")
+
+    def __init__(self, text=""):
+        self._text = text
+        self._cursor = len(text)
+
+    def __len__(self):
+        return len(self._text)
+
+    def __str__(self):
+        return self._text
+
+    def __repr__(self):
+        return f"InputBuffer({self._text!r})"
+
+    @property
+    def cursor(self):
+        """Index of the insertion point."""
+        return self._cursor
+
+    def text(self):
+        """Returns the buffer contents as a string."""
+        return self._text
+
+    def set(self, text):
+        """Replaces the contents and puts the cursor at the end."""
+        self._text = text
+        self._cursor = len(text)
+
+    def clear(self):
+        self.set("")
+
+    def move_to(self, index):
+        """Moves the cursor to index, clamped to the buffer."""
+        self._cursor = max(0, min(index, len(self._text)))
+
+    def insert(self, text):
+        """Inserts text at the cursor and returns the index it was inserted at."""
+        index = self._cursor
+        if text:
+            current = self._text
+            if index == len(current):
+                self._text = current + text
+            else:
+                self._text = current[:index] + text + current[index:]
+            self._cursor = index + len(text)
+        return index
+
+    def delete_before(self, count=1):
+        """
+        Deletes up to count characters before the cursor.
+        Returns (index, removed): where the deletion starts and how many
+        characters were removed.
+        """
+        end = self._cursor
+        removed = min(count, end)
+        if removed:
+            start = end - removed
+            self._text = self._text[:start] + self._text[end:]
+            self._cursor = start
+        return self._cursor, removed
@@ -0,0 +1,64 @@
+"""
+Bulk input normalisation for pasted text and scanner bursts.
+
+Typed keys are filtered one at a time by on_key_press. A 10,000 character
+formula pasted from a spreadsheet, or a burst from a barcode scanner, is
+instead checked in a single str.translate pass: characters the calculator
+accepts are kept, common typographic operators are mapped to their Python
+spelling and whitespace is dropped. Anything else (letters, "," or ";"
+separators, "=SUM(A1:A3)") rejects the whole text: dropping it would quietly
+change the value, e.g. "2,5" into 25. Exponent markers are letters too, but
+1.5E+10 is a number, so e and E are kept when they sit between a mantissa and
+its exponent. π is spelled out as its digits, so it must not touch a number
+("2π" would become 23.14...).
+"""
+import re
+from math import pi
+
+from pycal.core import KEY_CHARACTERS
+
+
+class InputRejected(ValueError):
+    """Raised when text contains something other than calculator input."""
+
+
+class _InputTable(dict):
+    """str.translate table that rejects every character it has no entry for."""
+
+    def __missing__(self, key):
+        raise InputRejected(f"unexpected {chr(key)!r}")
+
+
+INPUT_TABLE = _InputTable({ord(c): c for c in KEY_CHARACTERS + "eE"})
+INPUT_TABLE.update({ord(c): None for c in " \t\r\n\xa0"})
+INPUT_TABLE.update({
+    ord("^"): "**",
+    ord("×"): "*",
+    ord("÷"): "/",
+    ord("−"): "-",  # U+2212 minus sign
+    ord("π"): str(pi),
+})
+
+# An e that is not an exponent marker, e.g. the "e" of "2e" or "e5".
+_BARE_E = re.compile(r"(?<![0-9.])[eE]|[eE](?![+-]?[0-9])")
+# Whitespace between two numbers would join them ("1 000", "3\t4").
+_SPLIT_NUMBER = re.compile(r"[0-9.]\s+[0-9.]")
+# π next to a number or another π would run into it once replaced by its digits.
+_JOINED_PI = re.compile(r"[0-9.eEπ]\s*π|π\s*[0-9.eEπ]")
+
+
+def normalize_input(text):
+    """
+    Returns text as calculator input in one pass; raises InputRejected if it
+    contains anything that is not.
+    """
+    result = text.translate(INPUT_TABLE)
+    if "π" in text and _JOINED_PI.search(text):
+        raise InputRejected("π next to a number")
+    if "e" in result or "E" in result:
+        bare = _BARE_E.search(result)
+        if bare:
+            raise InputRejected(f"unexpected {bare.group()!r}")
+    if len(result) != len(text) and _SPLIT_NUMBER.search(text):
+        raise InputRejected("numbers separated by spaces")
+    return result
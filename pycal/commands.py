@@ -0,0 +1,133 @@
+"""
+Command dispatch and macro recording.
+
+Button labels and keys used to be matched against a chain of if/elif string
+comparisons. CommandRegistry maps each label to its handler in a dict, and
+each key (event.char or keysym) to a label, so dispatch is one lookup
+whatever the size of the keypad.
+
+MacroRecorder captures the labels that go through dispatch. A macro is a
+plain tuple of labels, saved one label per line, and can be replayed straight
+into a dispatch function without going through the Tk event loop. That is
+used for repetitive workflows as well as for timing the input -> evaluate ->
+display path. Replayed into pycal.core.Calculator it needs no GUI at all:
+
+    python -m pycal.commands MACRO_FILE [-n REPEAT]
+"""
+import sys
+import time
+
+
+class CommandRegistry:
+    """
+    Maps labels to handlers. Labels without a handler go to fallback(label),
+    e.g. digits and operators that are inserted as typed.
+    """
+    def __init__(self, fallback=None):
+        self.handlers = {}
+        self.keys = {}
+        self.fallback = fallback
+
+    def register(self, label, handler, keys=()):
+        """handler() is called for label; keys are event.char or keysym values."""
+        self.handlers[label] = handler
+        for key in keys:
+            self.keys[key] = label
+
+    def label_for_key(self, key):
+        return self.keys.get(key)
+
+    def dispatch(self, label):
+        handler = self.handlers.get(label)
+        if handler is not None:
+            handler()
+        elif self.fallback is not None:
+            self.fallback(label)
+
+    def __contains__(self, label):
+        return label in self.handlers
+
+
+class MacroRecorder:
+    """Records dispatched labels between start() and stop()."""
+
+    def __init__(self):
+        self.recording = None  # List of labels while recording.
+        self.macro = ()        # Last recorded macro.
+
+    @property
+    def is_recording(self):
+        return self.recording is not None
+
+    def start(self):
+        self.recording = []
+
+    def stop(self):
+        """Ends the recording and returns it as the current macro."""
+        if self.recording is not None:
+            self.macro = tuple(self.recording)
+            self.recording = None
+        return self.macro
+
+    def record(self, label):
+        if self.recording is not None:
+            self.recording.append(label)
+
+
+def replay(macro, dispatch, repeat=1):
+    """Feeds the labels of macro to dispatch, repeat times, at full speed."""
+    for _ in range(repeat):
+        for label in macro:
+            dispatch(label)
+
+
+def time_replay(macro, dispatch, repeat=1, flush=None):
+    """
+    Replays macro and returns the throughput in commands per second.
+    flush() is called after the replay, e.g. to include the display update.
+    """
+    start = time.perf_counter()
+    replay(macro, dispatch, repeat)
+    if flush is not None:
+        flush()
+    elapsed = time.perf_counter() - start
+    return len(macro) * repeat / elapsed if elapsed > 0 else float("inf")
+
+
+def save_macro(macro, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(label + "\n" for label in macro)
+
+
+def load_macro(path):
+    with open(path, encoding="utf-8") as f:
+        return tuple(line.rstrip("\n") for line in f if line.rstrip("\n"))
+
+
+def build_parser():
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog="python -m pycal.commands",
+        description="Replay a recorded macro on a headless calculator.")
+    parser.add_argument("macro", metavar="MACRO_FILE", help="macro file, one label per line")
+    parser.add_argument("-n", "--repeat", type=int, default=1, metavar="N",
+                        help="replay the macro N times (default: 1)")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="do not report throughput on stderr")
+    return parser
+
+
+def main(argv=None):
+    from pycal.core import Calculator
+    args = build_parser().parse_args(argv)
+    macro = load_macro(args.macro)
+    calc = Calculator()
+    rate = time_replay(macro, calc.press, args.repeat)
+    print(calc.display_text())
+    if not args.quiet:
+        print(f"{len(macro) * args.repeat} commands, {rate:,.0f} commands/s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
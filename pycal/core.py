@@ -0,0 +1,201 @@
+"""
+Calculator state and commands without a GUI.
+
+Calculator holds everything a PyCal front end edits and evaluates: the input
+buffer, the memory register and the history. The tkinter skins only forward
+key labels to it and render its display text; command-line tools, workers and
+macro replay drive it directly.
+
+Importing this module does not import tkinter, and the expression engine,
+cost estimator, worker processes and math are only imported when they are
+first needed, so it stays cheap enough for short-lived processes.
+"""
+from pycal.buffer import InputBuffer
+from pycal.commands import CommandRegistry
+from pycal.history import HistoryStore, DEFAULT_CAPACITY as HISTORY_CAPACITY
+
+# Text shown instead of the input when a command failed.
+ERROR = "Error"
+
+# Limits for expressions that the cost estimator sends to a guarded worker.
+GUARDED_CPU_SECONDS = 10
+GUARDED_MEMORY_BYTES = 512 * 1024 * 1024
+
+# Characters accepted from the keyboard as typed input.
+KEY_CHARACTERS = "0123456789+-*/%()."
+
+# Keys that apply a single-operand operation to the input: label -> operation.
+OPERATION_KEYS = {"√": "sqrt", "|x|": "abs", "log": "log", "ln": "ln",
+                  "sin": "sin", "cos": "cos", "tan": "tan"}
+
+
+# The compiler and cost estimator import ast, which is slow to import; they
+# are loaded by the first compile_input() call.
+_engine = _cost = None
+
+
+class ExpressionTooLarge(ArithmeticError):
+    """Raised when the cost estimate rules an expression out without evaluating it."""
+
+
+def compile_input(text):
+    """
+    Compiles text and decides how to evaluate it, the way "=" does.
+    Returns (CompiledExpression, path) with path pycal.cost.INLINE or GUARDED;
+    raises ExpressionTooLarge if the cost estimate rejects the expression.
+    """
+    global _engine, _cost
+    if _engine is None:
+        from pycal import cost, engine
+        _engine, _cost = engine, cost
+    expression = _engine.compile_expression(text)
+    path = _cost.route_expression(expression)
+    if path == _cost.REJECT:
+        raise ExpressionTooLarge("Result too large to compute")
+    return expression, path
+
+
+def guarded_job(expression):
+    """Returns an EvaluationJob, not yet started, for a GUARDED expression."""
+    from pycal.worker import EvaluationJob
+    return EvaluationJob(expression.source, GUARDED_CPU_SECONDS, GUARDED_MEMORY_BYTES)
+
+
+def evaluate_compiled(expression, path):
+    """Evaluates a compile_input() result and returns its display text, waiting for a guarded job."""
+    if path == _cost.INLINE:
+        return str(expression())
+    job = guarded_job(expression).start()
+    job.wait()
+    return job.result()
+
+
+class Calculator:
+    """
+    One calculator: input, memory and history, operated by key labels.
+    Trigonometric keys take degrees unless degrees is False.
+    """
+    def __init__(self, degrees=True, history_capacity=HISTORY_CAPACITY):
+        self.degrees = degrees
+        self.buffer = InputBuffer()
+        self.memory = 0
+        self.history = HistoryStore(history_capacity)
+        self.message = None  # Shown instead of the input (e.g. ERROR) until the next edit.
+        self.commands = self.build_commands()
+
+    def build_commands(self):
+        """Maps keypad labels and keys to methods; other labels are inserted as typed."""
+        commands = CommandRegistry(fallback=self.insert)
+        commands.register("=", self.calculate, keys=("\r",))
+        commands.register("C", self.clear)
+        commands.register("AC", self.clear)
+        commands.register("⌫", self.backspace, keys=("\x08",))
+        commands.register("±", self.toggle_sign)
+        commands.register("^", lambda: self.insert("**"))
+        commands.register("π", lambda: self.insert_constant("pi"))
+        commands.register("e", lambda: self.insert_constant("e"))
+        commands.register("MC", self.memory_clear)
+        commands.register("MR", self.memory_recall)
+        commands.register("M+", self.memory_add)
+        commands.register("M-", self.memory_subtract)
+        for label, name in OPERATION_KEYS.items():
+            commands.register(label, lambda n=name: self.apply(n))
+        return commands
+
+    def press(self, label):
+        """
+        Runs the command for a keypad label. Failures show ERROR instead of
+        raising; returns False if the command failed.
+        """
+        try:
+            self.commands.dispatch(label)
+        except Exception:
+            self.message = ERROR
+            return False
+        return True
+
+    def label_for_key(self, key):
+        """Returns the label for a typed character (event.char), or None."""
+        if key and key in KEY_CHARACTERS:
+            return key
+        return self.commands.label_for_key(key)
+
+    @property
+    def input(self):
+        return self.buffer.text()
+
+    @input.setter
+    def input(self, text):
+        self.buffer.set(text)
+        self.message = None
+
+    def display_text(self):
+        """Text for the display: the message if there is one, else the input."""
+        return self.message if self.message is not None else self.buffer.text()
+
+    # Editing. Each method returns the lowest input index it changed.
+
+    def insert(self, text):
+        self.message = None
+        return self.buffer.insert(text)
+
+    def insert_constant(self, name):
+        import math
+        return self.insert(str(getattr(math, name)))
+
+    def backspace(self):
+        self.message = None
+        index, _ = self.buffer.delete_before(1)
+        return index
+
+    def clear(self):
+        self.message = None
+        self.buffer.clear()
+        return 0
+
+    def toggle_sign(self):
+        if self.input:
+            self.input = str(-float(self.input))
+        return 0
+
+    def apply(self, name):
+        """Applies a single-operand key (sqrt, abs, log, ln, sin, cos, tan) to the input."""
+        from pycal.engine import apply_operation
+        self.input = str(apply_operation(name, self.input, self.degrees))
+        return 0
+
+    # Memory register.
+
+    def memory_clear(self):
+        self.memory = 0
+
+    def memory_recall(self):
+        return self.insert(str(self.memory))
+
+    def memory_add(self):
+        self.memory += float(self.input)
+
+    def memory_subtract(self):
+        self.memory -= float(self.input)
+
+    # Evaluation.
+
+    def compile(self):
+        """compile_input() for the current input."""
+        return compile_input(self.input)
+
+    def calculate(self):
+        """
+        Evaluates the input, records it in the history and shows the result.
+        Expensive expressions run in a worker process with CPU and memory
+        limits; this call waits for it.
+        """
+        expression, path = self.compile()
+        result = evaluate_compiled(expression, path)
+        self.record(expression.source, result)
+        return result
+
+    def record(self, expression, result):
+        """Adds a finished calculation to the history and shows its result."""
+        self.history.append(expression, result)
+        self.input = result
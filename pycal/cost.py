@@ -0,0 +1,198 @@
+"""
+Static cost estimation for compiled expressions.
+
+Before an expression is evaluated its AST is walked once to estimate how large
+the result can get (in decimal digits) and how much work producing it takes.
+The estimate is an upper bound built from the operand sizes:
+
+    a + b, a - b   max(digits) + log10(2)
+    a * b          digits(a) + digits(b)        (product chains add up)
+    a ** b         digits(a) * value(b)         (towers explode quickly)
+
+Only integers can grow without bound; float arithmetic is constant time and
+fails fast with OverflowError. route() turns an estimate into one of INLINE,
+GUARDED or REJECT so the common case keeps evaluating on the fast path.
+
+An integer result also has to be shown, and str() refuses integers longer
+than the interpreter's int_max_str_digits (4300 by default). Such results are
+rejected up front, whatever the work; intermediate values may be larger, so
+e.g. 3**(10**7) % 7 still goes to the guarded worker.
+"""
+import ast
+import math
+import sys
+
+INLINE = "inline"
+GUARDED = "guarded"
+REJECT = "reject"
+
+# Expressions below this much work are evaluated directly on the caller's thread.
+INLINE_WORK_LIMIT = 2e7
+# Results with more digits than this are rejected without evaluating them.
+MAX_RESULT_DIGITS = 5e6
+# Expressions estimated above this much work are rejected without evaluating them.
+MAX_WORK = 5e10
+# Without ** an integer result has hardly more digits than the expression has
+# characters, so expressions up to this length are inline without an estimate.
+SHORT_EXPRESSION = 200
+
+# Karatsuba exponent used for the cost of big-integer multiplication.
+_MUL_EXPONENT = math.log2(3)
+_FLOAT_DIGITS = 309.0
+# A sum can be at most twice its largest operand.
+_CARRY_DIGITS = math.log10(2)
+# Integers up to this many digits are tracked exactly (for exponents).
+_EXACT_DIGITS = 30
+
+
+class CostEstimate:
+    """Upper bounds for the result size and work of an expression."""
+    __slots__ = ("digits", "work", "is_int", "value")
+
+    def __init__(self, digits, work, is_int, value=None):
+        self.digits = digits
+        self.work = work
+        self.is_int = is_int
+        self.value = value  # Exact value when it is a small known integer.
+
+    def __repr__(self):
+        kind = "int" if self.is_int else "float"
+        return f"CostEstimate(digits={self.digits:.3g}, work={self.work:.3g}, {kind})"
+
+
+def _mul_work(a, b):
+    """Approximate cost of multiplying integers with a and b digits."""
+    small, large = sorted((max(a, 1.0), max(b, 1.0)))
+    if math.isinf(large):
+        return math.inf
+    try:
+        return (large / small) * small ** _MUL_EXPONENT
+    except OverflowError:  # Finite digit counts past about 1e194.
+        return math.inf
+
+
+def _digits(value):
+    """Decimal magnitude of a known integer (0 for 0, 1 and -1)."""
+    return math.log10(abs(value)) if abs(value) > 1 else 0.0
+
+
+def _float(work):
+    return CostEstimate(_FLOAT_DIGITS, work + 1, False)
+
+
+def _children(node):
+    if isinstance(node, ast.Expression):
+        return (node.body,)
+    if isinstance(node, ast.BinOp):
+        return (node.left, node.right)
+    if isinstance(node, ast.UnaryOp):
+        return (node.operand,)
+    if isinstance(node, ast.Call):
+        return (node.args[0],)
+    return ()
+
+
+def _combine(node, children):
+    """Estimates one node from the estimates of its children."""
+    if isinstance(node, ast.Expression):
+        return children[0]
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if isinstance(value, int):
+            digits = max(value.bit_length() * math.log10(2), 1.0)
+            # Literal conversion from text is quadratic in its length.
+            return CostEstimate(digits, digits * digits, True,
+                                value if digits < _EXACT_DIGITS else None)
+        return _float(0)
+    if isinstance(node, ast.Name):
+        return _float(0)
+    if isinstance(node, ast.UnaryOp):
+        operand = children[0]
+        value = operand.value
+        if value is not None and isinstance(node.op, ast.USub):
+            value = -value
+        return CostEstimate(operand.digits, operand.work + operand.digits, operand.is_int, value)
+    if isinstance(node, ast.Call):
+        arg = children[0]
+        if node.func.id == "abs":
+            return CostEstimate(arg.digits, arg.work + arg.digits, arg.is_int)
+        return _float(arg.work)
+    if isinstance(node, ast.BinOp):
+        left, right = children
+        work = left.work + right.work
+        if not (left.is_int and right.is_int) or isinstance(node.op, ast.Div):
+            return _float(work)
+        op = node.op
+        if isinstance(op, (ast.Add, ast.Sub)):
+            digits = max(left.digits, right.digits) + _CARRY_DIGITS
+            return CostEstimate(digits, work + digits, True)
+        if isinstance(op, ast.Mult):
+            digits = left.digits + right.digits
+            return CostEstimate(digits, work + _mul_work(left.digits, right.digits), True)
+        if isinstance(op, (ast.FloorDiv, ast.Mod)):
+            digits = left.digits if isinstance(op, ast.FloorDiv) else right.digits
+            return CostEstimate(digits, work + _mul_work(left.digits, right.digits), True)
+        if isinstance(op, ast.Pow):
+            if right.value is not None:
+                if right.value < 0:
+                    return _float(work)
+                exponent = right.value
+            else:
+                # value(b) <= 10 ** digits(b); beyond that it is unbounded anyway.
+                exponent = 10.0 ** right.digits if right.digits < 300 else math.inf
+            base = _digits(left.value) if left.value is not None else left.digits
+            digits = base * exponent if base else 0.0
+            value = None
+            if digits < _EXACT_DIGITS and left.value is not None and right.value is not None:
+                value = left.value ** right.value
+            # Exponentiation by squaring ends with a multiplication of two
+            # half-size numbers, which dominates the total cost.
+            return CostEstimate(max(digits, 1.0), work + 2 * _mul_work(digits / 2, digits / 2),
+                                True, value)
+    raise TypeError(f"Cannot estimate {type(node).__name__}")
+
+
+def estimate(tree):
+    """Returns the CostEstimate for a validated expression AST."""
+    # Iterative post-order walk, so long operator chains cannot hit the
+    # recursion limit.
+    results = []
+    stack = [(tree, False)]
+    while stack:
+        node, expanded = stack.pop()
+        children = _children(node)
+        if expanded or not children:
+            count = len(children)
+            args = results[len(results) - count:] if count else []
+            del results[len(results) - count:]
+            results.append(_combine(node, args))
+        else:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(children))
+    return results[0]
+
+
+def max_result_digits():
+    """Largest integer result, in digits, that can still be displayed."""
+    limit = sys.get_int_max_str_digits() if hasattr(sys, "get_int_max_str_digits") else 0
+    return min(limit, MAX_RESULT_DIGITS) if limit else MAX_RESULT_DIGITS
+
+
+def route(cost):
+    """Decides how an expression with the given CostEstimate is evaluated."""
+    # cost.digits bounds log10 of the result, which has at most one digit more.
+    if cost.is_int and cost.digits >= max_result_digits():
+        return REJECT
+    if cost.work <= INLINE_WORK_LIMIT:
+        return INLINE
+    if cost.digits > MAX_RESULT_DIGITS or cost.work > MAX_WORK:
+        return REJECT
+    return GUARDED
+
+
+def route_expression(expression):
+    """route(estimate(...)) for a CompiledExpression, skipping the walk where it cannot matter."""
+    source = expression.source
+    if len(source) <= SHORT_EXPRESSION and "**" not in source:
+        return INLINE
+    return route(estimate(expression.tree))
@@ -0,0 +1,75 @@
+"""
+Frame-coalescing display updates.
+
+Every edit used to rewrite the tk.Entry immediately, so a paste or a barcode
+scanner burst caused hundreds of widget rewrites per second. DisplayScheduler
+only records what changed (the lowest edited index, a message to show, new
+history text) and flushes once with after_idle, i.e. after Tk has drained the
+pending events. The flush pushes only the changed tail of the input to the
+entry and updates the history label in the same pass.
+"""
+import tkinter as tk
+
+
+class DisplayScheduler:
+    """
+    Batches writes to the calculator display. text() returns the current input;
+    entry and history_label are the widgets to update.
+    """
+    def __init__(self, entry, text, history_label=None):
+        self.entry = entry
+        self.text = text
+        self.history_label = history_label
+        self.dirty_from = None   # Lowest input index changed since the last flush.
+        self.message = None      # Text such as "Error" to show instead of the input.
+        self.history_text = None
+        self.shown_length = 0    # Length of the input the entry is known to show.
+        self.showing_input = True
+        self.scheduled = False
+
+    def invalidate(self, start=0):
+        """The input changed from index start onwards."""
+        self.message = None
+        self.dirty_from = start if self.dirty_from is None else min(self.dirty_from, start)
+        self.schedule()
+
+    def show_message(self, message):
+        """Show message (e.g. "Error") in place of the input until it changes."""
+        self.message = message
+        self.dirty_from = None
+        self.schedule()
+
+    def set_history(self, text):
+        self.history_text = text
+        self.schedule()
+
+    def schedule(self):
+        if not self.scheduled:
+            self.scheduled = True
+            self.entry.after_idle(self.flush)
+
+    def flush(self):
+        """Applies all pending changes to the widgets."""
+        self.scheduled = False
+        entry = self.entry
+        if self.message is not None:
+            entry.delete(0, tk.END)
+            entry.insert(tk.END, self.message)
+            self.message = None
+            self.showing_input = False
+        elif self.dirty_from is not None:
+            text = self.text()
+            start = self.dirty_from
+            # Rewrite everything if the entry does not show the old input any
+            # more, e.g. after a message or when the widget itself was edited.
+            if (not self.showing_input or start > self.shown_length
+                    or int(entry.index(tk.END)) != self.shown_length):
+                start = 0
+            entry.delete(start, tk.END)
+            entry.insert(tk.END, text[start:])
+            self.shown_length = len(text)
+            self.showing_input = True
+        self.dirty_from = None
+        if self.history_text is not None and self.history_label is not None:
+            self.history_label.config(text=self.history_text)
+            self.history_text = None
@@ -0,0 +1,167 @@
+"""
+Restricted arithmetic expression engine.
+
+Expressions are parsed once into a Python AST, checked against a whitelist of
+arithmetic nodes and compiled to a code object. Compiled expressions are kept
+in a bounded LRU cache keyed by the normalised expression text, so pressing
+"=" on an expression that was evaluated before skips parsing entirely.
+"""
+import ast
+from functools import lru_cache
+
+# Number of compiled expressions kept in the LRU cache.
+CACHE_SIZE = 512
+
+# Operators the calculator can produce from its keypad and keyboard bindings.
+_BINARY_OPS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow)
+_UNARY_OPS = (ast.UAdd, ast.USub)
+
+# Names that the old eval() based implementation could see through the
+# module globals of PyCal.V16.py.
+_CONSTANTS = ("pi", "e")
+_FUNCTIONS = ("sqrt", "log", "log10", "sin", "cos", "tan", "abs")
+
+_namespace = None
+_operations = {}
+
+
+class ExpressionError(ValueError):
+    """Raised when an expression is not valid calculator arithmetic."""
+
+
+def normalize(text):
+    """Returns the cache key for an expression."""
+    return text.strip()
+
+
+def _get_namespace():
+    """Builds the evaluation namespace on first use."""
+    global _namespace
+    if _namespace is None:
+        import math
+        namespace = {"__builtins__": {}, "abs": abs}
+        for name in _CONSTANTS + _FUNCTIONS:
+            if name != "abs":
+                namespace[name] = getattr(math, name)
+        _namespace = namespace
+    return _namespace
+
+
+def _check(tree):
+    """Validates that the AST only contains calculator arithmetic."""
+    # ast.walk is iterative, so long operator chains do not hit the recursion limit.
+    callees = set()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Expression, ast.Load)):
+            continue
+        if isinstance(node, ast.BinOp):
+            if not isinstance(node.op, _BINARY_OPS):
+                raise ExpressionError(f"Operator {type(node.op).__name__} is not supported")
+        elif isinstance(node, ast.UnaryOp):
+            if not isinstance(node.op, _UNARY_OPS):
+                raise ExpressionError(f"Operator {type(node.op).__name__} is not supported")
+        elif isinstance(node, _BINARY_OPS + _UNARY_OPS):
+            continue
+        elif isinstance(node, ast.Constant):
+            if type(node.value) not in (int, float):
+                raise ExpressionError(f"Literal {node.value!r} is not a number")
+        elif isinstance(node, ast.Name):
+            if node.id not in _CONSTANTS and id(node) not in callees:
+                raise ExpressionError(f"Unknown name {node.id!r}")
+        elif isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in _FUNCTIONS:
+                raise ExpressionError("Only calculator functions can be called")
+            if node.keywords or len(node.args) != 1:
+                raise ExpressionError(f"{node.func.id}() takes exactly one argument")
+            callees.add(id(node.func))
+        else:
+            raise ExpressionError(f"{type(node).__name__} is not allowed in an expression")
+
+
+class CompiledExpression:
+    """
+    A validated expression ready for repeated evaluation.
+    Calling the instance evaluates the expression and returns its value.
+    """
+    __slots__ = ("source", "tree", "code")
+
+    def __init__(self, source, tree, code):
+        self.source = source
+        self.tree = tree
+        self.code = code
+
+    def __call__(self):
+        return eval(self.code, _get_namespace())
+
+    def __repr__(self):
+        return f"CompiledExpression({self.source!r})"
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _compile_normalized(source):
+    try:
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError as exc:
+        raise ExpressionError(f"Invalid expression: {exc.msg}") from None
+    _check(tree)
+    # Compiling from the source rather than the tree keeps the same nesting
+    # limits as eval(); converting a deep tree back to C recurses in Python.
+    return CompiledExpression(source, tree, compile(source, "<pycal>", "eval"))
+
+
+def compile_expression(text):
+    """Returns the cached CompiledExpression for the given text."""
+    return _compile_normalized(normalize(text))
+
+
+def evaluate(text):
+    """Evaluates an expression with the same results as eval() on arithmetic."""
+    return compile_expression(text)()
+
+
+def _get_operations(degrees=True):
+    """Builds the single-operand operation table on first use."""
+    operations = _operations.get(degrees)
+    if operations is None:
+        import math
+
+        def angle(func):
+            # Trigonometric keys work in degrees, like the calculator UI.
+            if not degrees:
+                return func
+            return lambda value: func(value * (math.pi / 180))
+
+        operations = _operations[degrees] = {
+            "sqrt": math.sqrt,
+            "abs": abs,
+            "log": math.log10,
+            "ln": math.log,
+            "sin": angle(math.sin),
+            "cos": angle(math.cos),
+            "tan": angle(math.tan),
+        }
+    return operations
+
+
+def operation_names():
+    """Returns the names accepted by apply_operation()."""
+    return tuple(_get_operations())
+
+
+def apply_operation(name, text, degrees=True):
+    """
+    Applies a single-operand key (sqrt, abs, log, ln, sin, cos, tan) to the
+    number in text, exactly like pressing that key on the calculator.
+    With degrees=False the trigonometric keys take radians.
+    """
+    return _get_operations(degrees)[name](float(text))
+
+
+def cache_info():
+    """Returns the hit/miss statistics of the compile cache."""
+    return _compile_normalized.cache_info()
+
+
+def clear_cache():
+    """Drops all compiled expressions."""
+    _compile_normalized.cache_clear()
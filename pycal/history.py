@@ -0,0 +1,119 @@
+"""
+Bounded in-memory calculation history.
+
+HistoryStore is a ring buffer with a fixed capacity. Expression strings are
+interned, and results are stored in typed arrays (doubles and 64-bit ints)
+instead of as formatted strings; only results that fit neither array are kept
+as text. Appending is O(1) and reading the last k entries is O(k). Once the
+store is full, the oldest entry is overwritten.
+"""
+import sys
+from array import array
+
+DEFAULT_CAPACITY = 1000
+
+# Kind of result held in each slot.
+_FLOAT, _INT, _TEXT = 0, 1, 2
+_INT_MIN, _INT_MAX = -(1 << 63), (1 << 63) - 1
+
+
+def _classify(result):
+    """Returns (kind, value) for a result value or its display text."""
+    if isinstance(result, str):
+        try:
+            value = int(result)
+        except ValueError:
+            try:
+                value = float(result)
+            except ValueError:
+                return _TEXT, result
+            # Only keep floats whose display text survives the round trip.
+            return (_FLOAT, value) if str(value) == result else (_TEXT, result)
+        return (_INT, value) if str(value) == result else (_TEXT, result)
+    if type(result) is bool:
+        return _TEXT, str(result)
+    if isinstance(result, int):
+        return _INT, result
+    if isinstance(result, float):
+        return _FLOAT, result
+    return _TEXT, str(result)
+
+
+class HistoryStore:
+    """Ring buffer of (expression, result) pairs with a fixed capacity."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._expressions = [None] * capacity
+        self._kinds = array("b", bytes(capacity))
+        self._floats = array("d", bytes(8 * capacity))
+        self._ints = array("q", bytes(8 * capacity))
+        self._texts = {}  # slot -> result text for results that fit no array
+        self._start = 0   # slot of the oldest entry
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+    def __getitem__(self, index):
+        """Returns the entry at index (0 is the oldest) as "expression = result"."""
+        expression, result = self.entry(index)
+        return f"{expression} = {result}"
+
+    def append(self, expression, result):
+        """Adds a calculation; result may be a number or its display text."""
+        if self._count < self.capacity:
+            slot = (self._start + self._count) % self.capacity
+            self._count += 1
+        else:
+            slot = self._start
+            self._start = (self._start + 1) % self.capacity
+        kind, value = _classify(result)
+        if kind == _INT and not _INT_MIN <= value <= _INT_MAX:
+            kind, value = _TEXT, str(value)
+        self._expressions[slot] = sys.intern(expression)
+        self._kinds[slot] = kind
+        if kind == _FLOAT:
+            self._floats[slot] = value
+        elif kind == _INT:
+            self._ints[slot] = value
+        if kind == _TEXT:
+            self._texts[slot] = value
+        else:
+            self._texts.pop(slot, None)
+
+    def entry(self, index):
+        """
+        Returns (expression, result text) for index, where 0 is the oldest
+        entry; the same types as HistoryLog.entry().
+        """
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("history index out of range")
+        slot = (self._start + index) % self.capacity
+        kind = self._kinds[slot]
+        if kind == _FLOAT:
+            result = str(self._floats[slot])
+        elif kind == _INT:
+            result = str(self._ints[slot])
+        else:
+            result = self._texts[slot]
+        return self._expressions[slot], result
+
+    def last(self, k):
+        """Returns the last k entries as "expression = result" strings, oldest first."""
+        k = min(k, self._count)
+        return [self[i] for i in range(self._count - k, self._count)]
+
+    def clear(self):
+        self._expressions = [None] * self.capacity
+        self._texts.clear()
+        self._start = 0
+        self._count = 0
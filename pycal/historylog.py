@@ -0,0 +1,175 @@
+"""
+Persistent, append-only calculation history.
+
+The log is kept in two files inside one directory:
+
+    history.log   UTF-8 records "expression<TAB>result\\n", appended only
+    history.idx   one little-endian 64-bit offset per record into history.log
+
+Both files are read through mmap, so opening the log and reading the last N
+entries cost the same no matter how many years of history it holds. Appends
+are collected in memory and written in batches by flush(), which also fsyncs
+both files; callers are expected to flush on a timer and on exit. If a
+flush fails with OSError the entries stay queued for the next one.
+
+The data file is always written before the index, so a crash can only leave
+unindexed bytes at the end of history.log, which are ignored and overwritten.
+
+A log has a single writer: opening it takes an exclusive lock on history.log
+(where fcntl is available) and raises LogInUse if another process or window
+already holds it. The caller can then fall back to a session-only history.
+"""
+import mmap
+import os
+import struct
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Windows: no locking.
+
+DATA_FILE = "history.log"
+INDEX_FILE = "history.idx"
+
+_OFFSET = struct.Struct("<Q")
+
+
+class LogInUse(OSError):
+    """Raised when another HistoryLog has the directory open."""
+
+
+def _map(fileobj):
+    """Returns a read-only mmap of fileobj, or None if it is empty."""
+    if os.fstat(fileobj.fileno()).st_size == 0:
+        return None
+    return mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class HistoryLog:
+    """Append-only history log with a memory-mapped offset index."""
+
+    def __init__(self, directory, max_pending=256):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_pending = max_pending
+        self._data = open(os.path.join(directory, DATA_FILE), "a+b")
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._data.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self._data.close()
+                raise LogInUse(f"history in {directory} is in use by another process") from None
+        self._index = open(os.path.join(directory, INDEX_FILE), "a+b")
+        self._pending = []
+        self._data_map = None
+        self._index_map = None
+        self._recover()
+
+    def _recover(self):
+        """Drops index entries past the end of the data and unindexed data bytes."""
+        index_size = os.fstat(self._index.fileno()).st_size
+        count = index_size // _OFFSET.size
+        data_end = 0
+        if count:
+            self._remap()
+            data_size = len(self._data_map) if self._data_map is not None else 0
+            # Only the newest records can be affected by an interrupted flush.
+            while count:
+                last = self._offset(count - 1)
+                newline = self._data_map.find(b"\n", last) if last < data_size else -1
+                if newline >= 0:
+                    data_end = newline + 1
+                    break
+                count -= 1
+            self._close_maps()
+        if count * _OFFSET.size != index_size:
+            self._index.truncate(count * _OFFSET.size)
+        if os.fstat(self._data.fileno()).st_size != data_end:
+            self._data.truncate(data_end)
+        self._count = count
+        self._end = data_end
+
+    def __len__(self):
+        return self._count + len(self._pending)
+
+    def append(self, expression, result):
+        """Queues a calculation; it is written by the next flush()."""
+        self._pending.append((expression, str(result)))
+        if len(self._pending) >= self.max_pending:
+            self.flush()
+
+    def flush(self):
+        """Writes queued calculations and fsyncs both files."""
+        if not self._pending:
+            return
+        if (os.fstat(self._data.fileno()).st_size != self._end
+                or os.fstat(self._index.fileno()).st_size != self._count * _OFFSET.size):
+            # An earlier flush failed part-way (disk full, say) and left a
+            # partial batch behind; the queued entries are written again.
+            # Nobody else writes to the files while the lock is held.
+            self._close_maps()
+            self._data.truncate(self._end)
+            self._index.truncate(self._count * _OFFSET.size)
+        records = []
+        offsets = []
+        position = self._end
+        for expression, result in self._pending:
+            record = f"{_clean(expression)}\t{_clean(result)}\n".encode("utf-8")
+            offsets.append(_OFFSET.pack(position))
+            records.append(record)
+            position += len(record)
+        self._data.write(b"".join(records))
+        self._data.flush()
+        os.fsync(self._data.fileno())
+        self._index.write(b"".join(offsets))
+        self._index.flush()
+        os.fsync(self._index.fileno())
+        self._end = position
+        self._count += len(self._pending)
+        self._pending.clear()
+        self._close_maps()
+
+    def _remap(self):
+        self._close_maps()
+        self._data_map = _map(self._data)
+        self._index_map = _map(self._index)
+
+    def _close_maps(self):
+        for mapping in (self._data_map, self._index_map):
+            if mapping is not None:
+                mapping.close()
+        self._data_map = self._index_map = None
+
+    def _offset(self, i):
+        return _OFFSET.unpack_from(self._index_map, i * _OFFSET.size)[0]
+
+    def entry(self, i):
+        """Returns (expression, result) of entry i, where 0 is the oldest."""
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("history index out of range")
+        if i >= self._count:
+            return self._pending[i - self._count]
+        if self._index_map is None:
+            self._remap()
+        start = self._offset(i)
+        end = self._offset(i + 1) if i + 1 < self._count else self._end
+        expression, _, result = self._data_map[start:end - 1].decode("utf-8").partition("\t")
+        return expression, result
+
+    def last(self, n):
+        """Returns the last n entries as "expression = result" strings, oldest first."""
+        total = len(self)
+        return ["%s = %s" % self.entry(i) for i in range(max(total - n, 0), total)]
+
+    def close(self):
+        self.flush()
+        self._close_maps()
+        self._data.close()
+        self._index.close()
+
+
+def _clean(text):
+    """Keeps record separators out of stored text."""
+    return text.replace("\t", " ").replace("\n", " ")
@@ -0,0 +1,126 @@
+"""
+Virtualized list view for long histories.
+
+VirtualListView draws rows on a single Canvas and only owns canvas items for
+the rows that fit in the window. Scrolling does not create or delete items;
+the same pool is moved and given new text, so memory use and redraw cost stay
+flat whether the list has ten rows or a million. Row text is fetched on
+demand through a callback.
+"""
+import tkinter as tk
+
+
+class VirtualListView(tk.Frame):
+    """
+    Scrollable single-canvas list. row_text(i) returns the text of row i and
+    on_select(i) is called when a row is clicked.
+    """
+    def __init__(self, master, row_text, on_select=None, count=0, row_height=26,
+                 font=("Helvetica Neue", 12), bg="#121212", fg="#80DEEA",
+                 hover_bg="#222222", **kwargs):
+        super().__init__(master, bg=bg, **kwargs)
+        self.row_text = row_text
+        self.on_select = on_select
+        self.count = count
+        self.row_height = row_height
+        self.font = font
+        self.bg = bg
+        self.fg = fg
+        self.hover_bg = hover_bg
+        self.offset = 0      # Pixel offset of the top of the view into the list.
+        self.slots = []      # (background item, text item) per visible row
+        self.hover_row = None
+
+        self.canvas = tk.Canvas(self, bg=bg, highlightthickness=0, bd=0)
+        self.scrollbar = tk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
+
+        self.canvas.bind("<Configure>", lambda e: self.redraw())
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<Motion>", self.on_motion)
+        self.canvas.bind("<Leave>", lambda e: self.set_hover(None))
+        self.canvas.bind("<MouseWheel>", lambda e: self.scroll_rows(-1 if e.delta > 0 else 1))
+        self.canvas.bind("<Button-4>", lambda e: self.scroll_rows(-1))
+        self.canvas.bind("<Button-5>", lambda e: self.scroll_rows(1))
+
+    def set_count(self, count, keep_position=False):
+        """Change the number of rows, e.g. after a new search or calculation."""
+        self.count = count
+        if not keep_position:
+            self.offset = 0
+        self.redraw()
+
+    def max_offset(self):
+        return max(self.count * self.row_height - self.canvas.winfo_height(), 0)
+
+    def yview(self, *args):
+        """Scrollbar callback ("moveto fraction" or "scroll n units|pages")."""
+        if args[0] == "moveto":
+            self.offset = float(args[1]) * self.count * self.row_height
+        elif args[0] == "scroll":
+            amount, what = int(args[1]), args[2]
+            if what == "pages":
+                amount *= max(self.canvas.winfo_height() // self.row_height - 1, 1)
+            self.offset += amount * self.row_height
+        self.redraw()
+
+    def scroll_rows(self, rows):
+        self.offset += rows * 3 * self.row_height
+        self.redraw()
+
+    def ensure_slots(self, needed):
+        """Grow the item pool to the number of rows that fit; never shrinks."""
+        canvas = self.canvas
+        while len(self.slots) < needed:
+            background = canvas.create_rectangle(0, 0, 0, 0, fill=self.bg, outline="")
+            text = canvas.create_text(8, 0, anchor=tk.W, font=self.font, fill=self.fg)
+            self.slots.append((background, text))
+
+    def redraw(self):
+        """Reposition the item pool for the current scroll offset."""
+        canvas = self.canvas
+        height = canvas.winfo_height()
+        width = canvas.winfo_width()
+        self.offset = int(min(max(self.offset, 0), self.max_offset()))
+        first, shift = divmod(self.offset, self.row_height)
+        self.ensure_slots(height // self.row_height + 2)
+        for k, (background, text) in enumerate(self.slots):
+            row = first + k
+            y = k * self.row_height - shift
+            if row < self.count and y < height:
+                canvas.coords(background, 0, y, width, y + self.row_height)
+                canvas.itemconfig(background, state=tk.NORMAL,
+                                  fill=self.hover_bg if row == self.hover_row else self.bg)
+                canvas.coords(text, 8, y + self.row_height / 2)
+                canvas.itemconfig(text, state=tk.NORMAL, text=self.row_text(row))
+            else:
+                canvas.itemconfig(background, state=tk.HIDDEN)
+                canvas.itemconfig(text, state=tk.HIDDEN)
+        total = self.count * self.row_height
+        if total:
+            self.scrollbar.set(self.offset / total, min((self.offset + height) / total, 1.0))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def row_at(self, y):
+        row = int((self.offset + y) // self.row_height)
+        return row if 0 <= row < self.count else None
+
+    def set_hover(self, row):
+        if row == self.hover_row:
+            return
+        first = self.offset // self.row_height
+        for old in (self.hover_row, row):
+            if old is not None and 0 <= old - first < len(self.slots):
+                background = self.slots[old - first][0]
+                self.canvas.itemconfig(background, fill=self.hover_bg if old == row else self.bg)
+        self.hover_row = row
+
+    def on_motion(self, event):
+        self.set_hover(self.row_at(event.y))
+
+    def on_click(self, event):
+        row = self.row_at(event.y)
+        if row is not None and self.on_select is not None:
+            self.on_select(row)
@@ -0,0 +1,124 @@
+"""
+Single-canvas keypad.
+
+The widget keypad creates one NeonButton canvas per label, which means one Tk
+window, one set of bindings and one round of geometry management per button.
+CanvasKeypad draws the whole keypad on one Canvas instead: every button is an
+image item plus a text item, and the pointer position is mapped to a button
+with cell arithmetic. Hover changes one item's image with itemconfig.
+"""
+import tkinter as tk
+
+from pycal.render import rounded_rect_image, scale_font
+
+
+class CanvasKeypad(tk.Canvas):
+    """
+    Draws rows of labels as neon buttons on one canvas.
+    command(label) is called on click; frame_color(label) picks the outline colour.
+    """
+    def __init__(self, master, rows, command, frame_color,
+                 button_width=80, button_height=80, padding=8, corner_radius=15,
+                 font=("Helvetica Neue", 16, "bold"),
+                 normal_fill="#111111", hover_fill="#222222", **kwargs):
+        self.rows = [tuple(row) for row in rows]
+        self.columns = max(len(row) for row in self.rows)
+        self.button_width = button_width
+        self.button_height = button_height
+        self.padding = padding
+        super().__init__(master, width=self.columns * self.cell_width,
+                         height=len(self.rows) * self.cell_height,
+                         bg=master["bg"], highlightthickness=0, bd=0, **kwargs)
+        self.command = command
+        self.frame_color = frame_color
+        self.corner_radius = corner_radius
+        self.base_font = font
+        self.base_size = (button_width, button_height)
+        self.font = font
+        self.normal_fill = normal_fill
+        self.hover_fill = hover_fill
+        self.image_items = {}  # (row, column) -> image item
+        self.text_items = {}   # (row, column) -> text item
+        self.hover_cell = None
+
+        self.draw_keypad()
+        self.bind("<Button-1>", self.on_click)
+        self.bind("<Motion>", self.on_motion)
+        self.bind("<Leave>", lambda e: self.set_hover(None))
+
+    @property
+    def cell_width(self):
+        return self.button_width + 2 * self.padding
+
+    @property
+    def cell_height(self):
+        return self.button_height + 2 * self.padding
+
+    def button_image(self, label, fill):
+        return rounded_rect_image(self, self.button_width, self.button_height, self.corner_radius,
+                                  fill=fill, outline=self.frame_color(label), border=3, bg=self["bg"])
+
+    def draw_keypad(self):
+        """Creates one image and one text item per button."""
+        for r, row in enumerate(self.rows):
+            for c, label in enumerate(row):
+                x = c * self.cell_width + self.padding
+                y = r * self.cell_height + self.padding
+                self.image_items[r, c] = self.create_image(
+                    x, y, anchor=tk.NW, image=self.button_image(label, self.normal_fill))
+                self.text_items[r, c] = self.create_text(
+                    x + self.button_width / 2, y + self.button_height / 2,
+                    text=label, font=self.font, fill="#FFFFFF")
+
+    def resize(self, width, height):
+        """Fits the buttons to a canvas of width x height, reusing cached artwork."""
+        button_width = max(width // self.columns - 2 * self.padding, 1)
+        button_height = max(height // len(self.rows) - 2 * self.padding, 1)
+        if (button_width, button_height) == (self.button_width, self.button_height):
+            return
+        self.button_width, self.button_height = button_width, button_height
+        self.font = scale_font(self.base_font, min(button_width / self.base_size[0],
+                                                   button_height / self.base_size[1]))
+        for (r, c), image_item in self.image_items.items():
+            x = c * self.cell_width + self.padding
+            y = r * self.cell_height + self.padding
+            fill = self.hover_fill if (r, c) == self.hover_cell else self.normal_fill
+            self.coords(image_item, x, y)
+            self.itemconfig(image_item, image=self.button_image(self.rows[r][c], fill))
+            text_item = self.text_items[r, c]
+            self.coords(text_item, x + button_width / 2, y + button_height / 2)
+            self.itemconfig(text_item, font=self.font)
+
+    def cell_at(self, x, y):
+        """Returns the (row, column) of the button under x, y, or None."""
+        c, cx = divmod(int(x), self.cell_width)
+        r, cy = divmod(int(y), self.cell_height)
+        if not (0 <= r < len(self.rows) and 0 <= c < len(self.rows[r])):
+            return None
+        # The padding around each button is not part of it.
+        if not (self.padding <= cx < self.padding + self.button_width
+                and self.padding <= cy < self.padding + self.button_height):
+            return None
+        return r, c
+
+    def set_hover(self, cell):
+        if cell == self.hover_cell:
+            return
+        if self.hover_cell is not None:
+            r, c = self.hover_cell
+            self.itemconfig(self.image_items[r, c],
+                            image=self.button_image(self.rows[r][c], self.normal_fill))
+        if cell is not None:
+            r, c = cell
+            self.itemconfig(self.image_items[r, c],
+                            image=self.button_image(self.rows[r][c], self.hover_fill))
+        self.hover_cell = cell
+
+    def on_motion(self, event):
+        self.set_hover(self.cell_at(event.x, event.y))
+
+    def on_click(self, event):
+        cell = self.cell_at(event.x, event.y)
+        if cell is not None:
+            r, c = cell
+            self.command(self.rows[r][c])
@@ -0,0 +1,139 @@
+"""
+Click-to-pixel latency tracing.
+
+A trace starts when a click or key event reaches the calculator and follows
+the command through its stages:
+
+    handler   event received -> handler returned (includes eval)
+    eval      time spent evaluating, if the command evaluated anything
+    display   handler returned -> coalesced display writes flushed
+    paint     display flushed -> next idle point, after Tk redrew the widgets
+    total     event received -> paint
+
+Tk runs the idle callbacks that exist when an idle pass starts; callbacks
+added during the pass wait for the next one. The tracer uses this to step
+past the display flush and then past the redraws it schedules.
+
+Durations go into fixed log2 histograms per command and stage: bucket 0 holds
+times below 1 µs and bucket i times in [2**(i-1), 2**i) µs. Only one trace is
+in flight; events that arrive before it finishes (a burst of typing, say) are
+part of it.
+"""
+import json
+from array import array
+from time import perf_counter_ns
+
+BUCKETS = 32
+STAGES = ("handler", "eval", "display", "paint", "total")
+
+
+class Histogram:
+    """Counts of durations in fixed power-of-two buckets, plus total and max."""
+    __slots__ = ("counts", "count", "total_ns", "max_ns")
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * BUCKETS))
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, ns):
+        self.counts[min((ns // 1000).bit_length(), BUCKETS - 1)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile(self, q):
+        """Upper bound in µs of the bucket holding the q-quantile (0 < q <= 1)."""
+        if not self.count:
+            return 0
+        needed = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= needed:
+                return 1 << i
+        return 1 << (BUCKETS - 1)
+
+    def as_dict(self):
+        return {"count": self.count, "total_ms": self.total_ns / 1e6,
+                "max_ms": self.max_ns / 1e6, "buckets": self.counts.tolist()}
+
+
+class LatencyTracer:
+    """
+    Traces commands on widget's event loop. pending() returns True while the
+    front end still has display work queued (e.g. coalesced keystrokes).
+    """
+    def __init__(self, widget, pending=None):
+        self.widget = widget
+        self.pending = pending
+        self.histograms = {}   # (command, stage) -> Histogram
+        self.command = None    # Command of the trace in flight.
+        self.started = 0
+        self.handled_at = 0
+        self.displayed_at = 0
+        self.eval_ns = 0
+
+    def begin(self, command):
+        """Starts a trace at event receipt; returns False if one is already in flight."""
+        if self.command is not None:
+            return False
+        self.started = perf_counter_ns()
+        self.command = command
+        self.eval_ns = 0
+        return True
+
+    def add_eval(self, ns):
+        if self.command is not None:
+            self.eval_ns += ns
+
+    def handled(self):
+        """The handler that began the trace has returned."""
+        self.handled_at = perf_counter_ns()
+        self.widget.after_idle(self._after_display)
+
+    def _after_display(self):
+        if self.pending is not None and self.pending():
+            self.widget.after_idle(self._after_display)
+            return
+        self.displayed_at = perf_counter_ns()
+        self.widget.after_idle(self._after_paint)
+
+    def _after_paint(self):
+        now = perf_counter_ns()
+        command = self.command
+        self.record(command, "handler", self.handled_at - self.started)
+        if self.eval_ns:
+            self.record(command, "eval", self.eval_ns)
+        self.record(command, "display", self.displayed_at - self.handled_at)
+        self.record(command, "paint", now - self.displayed_at)
+        self.record(command, "total", now - self.started)
+        self.command = None
+
+    def record(self, command, stage, ns):
+        histogram = self.histograms.get((command, stage))
+        if histogram is None:
+            histogram = self.histograms[command, stage] = Histogram()
+        histogram.add(ns)
+
+    def summary_lines(self, stage="total"):
+        """One line per command for stage, slowest p99 first."""
+        rows = sorted(((h.percentile(0.99), command, h) for (command, s), h in self.histograms.items()
+                       if s == stage), key=lambda row: row[0], reverse=True)
+        lines = [f"{'command':<10}{'n':>7}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>10}  (µs, {stage})"]
+        for p99, command, h in rows:
+            lines.append(f"{command:<10}{h.count:>7}{h.percentile(0.5):>9}{h.percentile(0.9):>9}"
+                         f"{p99:>9}{h.max_ns // 1000:>10}")
+        return lines
+
+    def dump(self, path):
+        """Writes every histogram as JSON."""
+        commands = {}
+        for (command, stage), histogram in self.histograms.items():
+            commands.setdefault(command, {})[stage] = histogram.as_dict()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"bucket_upper_us": [1 << i for i in range(BUCKETS)],
+                       "stages": list(STAGES), "commands": commands}, f, indent=1)
+            f.write("\n")
@@ -0,0 +1,106 @@
+"""
+Memory profiling for long-running sessions.
+
+MemoryProfiler takes a tracemalloc snapshot at a fixed interval from the Tk
+event loop and appends a report to a file: traced memory, Tk resource counts
+(widgets, canvas items, pending after callbacks) and the allocation sites
+that grew the most since the previous sample and since profiling started.
+Slow leaks show up as the same lines growing sample after sample.
+
+tracemalloc slows allocation down noticeably, so this is a diagnostics mode
+and not meant to stay on.
+"""
+import time
+import tkinter as tk
+import tracemalloc
+
+SAMPLE_INTERVAL_MS = 60 * 1000
+TOP_ALLOCATIONS = 15
+
+# Allocations made by the profiler and the import system are not of interest.
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def tk_resource_counts(root):
+    """Returns (widgets, canvas items, pending after callbacks) for the tree under root."""
+    widgets = items = 0
+    stack = [root]
+    while stack:
+        widget = stack.pop()
+        widgets += 1
+        if isinstance(widget, tk.Canvas):
+            items += len(widget.find_all())
+        stack.extend(widget.winfo_children())
+    pending = len(root.tk.splitlist(root.tk.call("after", "info")))
+    return widgets, items, pending
+
+
+def _format_size(size):
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+class MemoryProfiler:
+    """Appends a memory report for root's application to path every interval_ms."""
+
+    def __init__(self, root, path, interval_ms=SAMPLE_INTERVAL_MS, top=TOP_ALLOCATIONS):
+        self.root = root
+        self.path = path
+        self.interval_ms = interval_ms
+        self.top = top
+        self.started = None
+        self.baseline = None
+        self.previous = None
+        self.samples = 0
+        self.after_id = None
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.started = time.monotonic()
+        self.baseline = self.previous = self.snapshot()
+        self.after_id = self.root.after(self.interval_ms, self.sample)
+        return self
+
+    def stop(self):
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+        tracemalloc.stop()
+
+    def snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(_FILTERS)
+
+    def sample(self):
+        """Writes one report and schedules the next."""
+        snapshot = self.snapshot()
+        self.samples += 1
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(self.report(snapshot)) + "\n\n")
+        self.previous = snapshot
+        self.after_id = self.root.after(self.interval_ms, self.sample)
+
+    def report(self, snapshot):
+        current, peak = tracemalloc.get_traced_memory()
+        widgets, items, pending = tk_resource_counts(self.root)
+        lines = [
+            f"=== sample {self.samples} at {time.strftime('%Y-%m-%d %H:%M:%S')}, "
+            f"uptime {time.monotonic() - self.started:.0f}s",
+            f"traced memory: current {_format_size(current)}, peak {_format_size(peak)}",
+            f"tk: {widgets} widgets, {items} canvas items, {pending} pending after callbacks",
+        ]
+        for title, base in (("since previous sample", self.previous), ("since start", self.baseline)):
+            lines.append(f"top allocations {title}:")
+            for stat in snapshot.compare_to(base, "lineno")[:self.top]:
+                frame = stat.traceback[0]
+                lines.append(f"  {frame.filename}:{frame.lineno}: {_format_size(stat.size_diff):>12} "
+                             f"(now {_format_size(stat.size)}), {stat.count_diff:+d} blocks")
+        return lines
@@ -0,0 +1,232 @@
+"""
+Incremental tokenizer and evaluator for the live result preview.
+
+The preview re-evaluates the input after every edit, so it must not start
+from scratch each time. IncrementalParser keeps the token list together with
+the parser state reached after each token. When the input changes from some
+index onwards, only the tokens touching the edit are dropped; lexing and
+parsing resume from the state saved before them.
+
+The parser is an operator-precedence (shunting-yard) evaluator with Python's
+precedence rules, including right-associative ** binding tighter than a unary
+minus on its left (-2**2 == -4). Its stacks are immutable linked tuples, so
+saving the state after a token is O(1).
+"""
+import math
+import re
+
+_TOKEN = re.compile(r"""
+    (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<name>[A-Za-z_]\w*)
+  | (?P<op>\*\*|//|[-+*/%()])
+  | (?P<space>\s+)
+  | (?P<bad>.)
+""", re.VERBOSE)
+
+_CONSTANTS = {"pi": math.pi, "e": math.e}
+_FUNCTIONS = {
+    "sqrt": math.sqrt, "log": math.log, "log10": math.log10, "abs": abs,
+    "sin": math.sin, "cos": math.cos, "tan": math.tan,
+}
+
+# Binary operators: (precedence, right associative).
+_BINARY = {
+    "+": (1, False), "-": (1, False),
+    "*": (2, False), "/": (2, False), "//": (2, False), "%": (2, False),
+    "**": (4, True),
+}
+_UNARY_PRECEDENCE = 3
+
+# Integer powers with more result bits than this are not previewed.
+MAX_PREVIEW_BITS = 64 * 1024
+
+
+class PreviewUnavailable(Exception):
+    """The input cannot be previewed (incomplete, invalid or too expensive)."""
+
+
+def _apply_binary(op, left, right):
+    if op == "+":
+        return left + right
+    if op == "-":
+        return left - right
+    if op == "*":
+        return left * right
+    if op == "/":
+        return left / right
+    if op == "//":
+        return left // right
+    if op == "%":
+        return left % right
+    if isinstance(left, int) and isinstance(right, int) and right > 0:
+        if max(left.bit_length(), 1) * right > MAX_PREVIEW_BITS:
+            raise PreviewUnavailable("result too large to preview")
+    return left ** right
+
+
+def _reduce(values, op):
+    """Applies the operator entry op to the value stack."""
+    kind, symbol = op
+    try:
+        if kind == "binary":
+            right, values = values
+            left, values = values
+            return (_apply_binary(symbol, left, right), values)
+        operand, values = values
+        if kind == "unary":
+            return (-operand if symbol == "-" else +operand, values)
+        return (_FUNCTIONS[symbol](operand), values)
+    except PreviewUnavailable:
+        raise
+    except Exception as exc:
+        raise PreviewUnavailable(str(exc)) from None
+
+
+# Parser state: (values, ops, expect_operand). Stacks are (head, tail) or None.
+_INITIAL = (None, None, True)
+
+
+def _step(state, kind, text):
+    """Returns the parser state after one token."""
+    values, ops, expect_operand = state
+    if ops is not None and ops[0][0] == "call" and text != "(":
+        raise PreviewUnavailable("function name must be followed by '('")
+    if kind == "number":
+        if not expect_operand:
+            raise PreviewUnavailable("missing operator")
+        if "." in text or "e" in text or "E" in text:
+            value = float(text)
+        elif len(text) > 1 and text[0] == "0" and text.strip("0"):
+            raise PreviewUnavailable("leading zeros")
+        else:
+            value = int(text)
+        return ((value, values), ops, False)
+    if kind == "name":
+        if not expect_operand:
+            raise PreviewUnavailable("missing operator")
+        if text in _CONSTANTS:
+            return ((_CONSTANTS[text], values), ops, False)
+        if text in _FUNCTIONS:
+            # Waits for its "(" like a prefix operator.
+            return (values, (("call", text), ops), True)
+        raise PreviewUnavailable(f"unknown name {text!r}")
+    if text == "(":
+        if not expect_operand:
+            raise PreviewUnavailable("missing operator")
+        return (values, (("paren", "("), ops), True)
+    if text == ")":
+        if expect_operand:
+            raise PreviewUnavailable("missing operand")
+        while ops is not None and ops[0][0] != "paren":
+            op, ops = ops
+            values = _reduce(values, op)
+        if ops is None:
+            raise PreviewUnavailable("unbalanced parenthesis")
+        ops = ops[1]
+        if ops is not None and ops[0][0] == "call":
+            op, ops = ops
+            values = _reduce(values, op)
+        return (values, ops, False)
+    if expect_operand:
+        if text in ("+", "-"):
+            return (values, (("unary", text), ops), True)
+        raise PreviewUnavailable("missing operand")
+    precedence, right_assoc = _BINARY[text]
+    while ops is not None:
+        top_kind, top = ops[0]
+        if top_kind == "binary":
+            top_precedence = _BINARY[top][0]
+        elif top_kind == "unary":
+            top_precedence = _UNARY_PRECEDENCE
+        else:
+            break
+        if top_precedence > precedence or (top_precedence == precedence and not right_assoc):
+            op, ops = ops
+            values = _reduce(values, op)
+        else:
+            break
+    return (values, (("binary", text), ops), True)
+
+
+def _finish(state):
+    """Completes the parse, closing any open parentheses."""
+    values, ops, expect_operand = state
+    if expect_operand:
+        raise PreviewUnavailable("incomplete expression")
+    while ops is not None:
+        op, ops = ops
+        if op[0] == "paren":
+            if ops is not None and ops[0][0] == "call":
+                op, ops = ops
+                values = _reduce(values, op)
+            continue
+        if op[0] == "call":
+            raise PreviewUnavailable("missing parenthesis")
+        values = _reduce(values, op)
+    return values[0]
+
+
+class IncrementalParser:
+    """
+    Keeps the tokens and parser states of the previewed input.
+    Call update() with the new text and the lowest index that changed.
+    """
+    def __init__(self):
+        self._tokens = []  # (end, kind, text)
+        self._states = []  # parser state after each token, or the exception raised
+        self.relexed = 0   # Characters lexed by the last update, for diagnostics.
+
+    def reset(self):
+        self._tokens = []
+        self._states = []
+
+    def update(self, text, start=0):
+        """Re-lexes and re-parses text from the token touching index start."""
+        keep = len(self._tokens)
+        # Drop every token that ends at or after start, plus one more, since an
+        # edit can extend the previous token ("1" -> "12", "*" -> "**", "1e" -> "1e5").
+        while keep and self._tokens[keep - 1][0] >= start:
+            keep -= 1
+        keep = max(keep - 1, 0)
+        # An exponent spans several tokens while it is typed: "8e-" lexes as
+        # 8, e, - and only becomes one number with its digits. Re-lex the
+        # mantissa too when it is directly followed by a name starting with e.
+        if keep and keep < len(self._tokens):
+            end, kind, _ = self._tokens[keep - 1]
+            next_end, next_kind, next_text = self._tokens[keep]
+            if (kind == "number" and next_kind == "name" and next_text[0] in "eE"
+                    and next_end - len(next_text) == end):
+                keep -= 1
+        del self._tokens[keep:]
+        del self._states[keep:]
+        position = self._tokens[-1][0] if self._tokens else 0
+        state = self._states[-1] if self._states else _INITIAL
+        self.relexed = len(text) - position
+        for match in _TOKEN.finditer(text, position):
+            kind = match.lastgroup
+            if kind == "space":
+                continue
+            token = match.group()
+            if not isinstance(state, Exception):
+                try:
+                    if kind == "bad":
+                        raise PreviewUnavailable(f"unexpected {token!r}")
+                    state = _step(state, kind, token)
+                except PreviewUnavailable as exc:
+                    state = exc
+            self._tokens.append((match.end(), kind, token))
+            self._states.append(state)
+
+    def value(self):
+        """Returns the value of the current text or raises PreviewUnavailable."""
+        state = self._states[-1] if self._states else _INITIAL
+        if isinstance(state, Exception):
+            raise state
+        return _finish(state)
+
+    def preview(self):
+        """Returns the preview text for the current input, or "" if there is none."""
+        try:
+            return str(self.value())
+        except (PreviewUnavailable, ValueError):
+            return ""
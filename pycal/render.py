@@ -0,0 +1,81 @@
+"""
+Pre-rendered button artwork.
+
+Drawing a NeonButton used to mean deleting every canvas item and building a
+smoothed polygon and a text item again on each hover. The rounded rectangle
+is now rasterised once per (size, radius, colours) into a Tk PhotoImage and
+cached, so a state change only swaps the image of one canvas item.
+
+Labels are not baked into the images: plain Tk cannot render text into a
+PhotoImage, so each button keeps a single text item that is laid out once.
+"""
+import math
+import tkinter as tk
+
+# Cached images per Tk root: {root: {key: PhotoImage}}.
+_cache = {}
+
+
+def _distance(px, py, cx, cy, half_w, half_h, radius):
+    """Signed distance from a pixel centre to the rounded rectangle's edge."""
+    qx = abs(px - cx) - (half_w - radius)
+    qy = abs(py - cy) - (half_h - radius)
+    outside = math.hypot(max(qx, 0.0), max(qy, 0.0))
+    inside = min(max(qx, qy), 0.0)
+    return outside + inside - radius
+
+
+def _rows(width, height, inset, radius, fill, outline, border, bg):
+    """Yields each pixel row of the image as a Tk colour list."""
+    cx, cy = width / 2, height / 2
+    half_w, half_h = width / 2 - inset, height / 2 - inset
+    radius = min(radius, half_w, half_h)
+    # A row only depends on its distance from the centre line, and every row
+    # further than radius + border from the top and bottom edges is the same.
+    flat = half_h - radius - border
+    rows = {}
+    for y in range(height):
+        dy = max(abs(y + 0.5 - cy), flat)
+        row = rows.get(dy)
+        if row is None:
+            pixels = []
+            for x in range(width):
+                d = _distance(x + 0.5, dy + cy, cx, cy, half_w, half_h, radius)
+                if d > 0:
+                    pixels.append(bg)
+                elif d > -border:
+                    pixels.append(outline)
+                else:
+                    pixels.append(fill)
+            row = rows[dy] = "{" + " ".join(pixels) + "}"
+        yield row
+
+
+def rounded_rect_image(widget, width, height, radius, fill, outline, border=3, bg="#121212", inset=1):
+    """
+    Returns a cached PhotoImage of a filled rounded rectangle with a border.
+    Pixels outside the shape are painted with bg, the background it sits on.
+    """
+    root = widget._root()
+    images = _cache.setdefault(root, {})
+    key = (width, height, radius, fill, outline, border, bg, inset)
+    image = images.get(key)
+    if image is None:
+        image = tk.PhotoImage(master=root, width=width, height=height)
+        image.put(" ".join(_rows(width, height, inset, radius, fill, outline, border, bg)))
+        images[key] = image
+    return image
+
+
+def scale_font(font, factor):
+    """Returns a (family, size, ...) font tuple with its size scaled by factor."""
+    family, size, *rest = font
+    return (family, max(8, round(size * factor)), *rest)
+
+
+def clear_cache(widget=None):
+    """Drops cached images for the root of widget, or for every root."""
+    if widget is None:
+        _cache.clear()
+    else:
+        _cache.pop(widget._root(), None)
@@ -0,0 +1,49 @@
+"""
+Debounced relayout on window resize.
+
+Dragging a window edge produces a <Configure> event for almost every pixel of
+movement. ResizeCoalescer collects them and calls its callback once the size
+has not changed for a short while. Sizes are rounded down to a bucket, so
+small jitters do not trigger a redraw and renders cached per size (see
+pycal.render) are reused when the window returns to a similar size.
+"""
+
+
+def quantize(value, bucket):
+    """Rounds value down to a multiple of bucket (at least one bucket)."""
+    return max(bucket, value // bucket * bucket)
+
+
+class ResizeCoalescer:
+    """
+    Calls on_resize(width, height) with the quantized size of widget once
+    resizing has settled, and only when the quantized size changed.
+    """
+    def __init__(self, widget, on_resize, delay_ms=80, bucket=16):
+        self.widget = widget
+        self.on_resize = on_resize
+        self.delay_ms = delay_ms
+        self.bucket = bucket
+        self.size = None       # Last quantized size passed to on_resize.
+        self.pending = None    # Latest size seen in a <Configure> event.
+        self.after_id = None
+        widget.bind("<Configure>", self.on_configure, add="+")
+
+    def on_configure(self, event):
+        if event.widget is not self.widget:
+            return
+        self.pending = (event.width, event.height)
+        if self.after_id is not None:
+            self.widget.after_cancel(self.after_id)
+        self.after_id = self.widget.after(self.delay_ms, self.flush)
+
+    def flush(self):
+        """Applies the latest size now."""
+        self.after_id = None
+        if self.pending is None:
+            return
+        width, height = self.pending
+        size = (quantize(width, self.bucket), quantize(height, self.bucket))
+        if size != self.size:
+            self.size = size
+            self.on_resize(*size)
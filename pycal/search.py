@@ -0,0 +1,141 @@
+"""
+Search index over calculation history.
+
+HistoryIndex sits on top of an append-only history source with len() and
+entry(i), such as HistoryLog, and offers two indexes:
+
+    text     trigram inverted index over "expression<TAB>result"; a query
+             of three or more characters walks the shortest posting list of
+             its trigrams, newest first, and verifies each candidate
+    numeric  results sorted by value, for exact values and "lo..hi" ranges
+
+Searches only cover the entries indexed so far. catch_up() indexes the
+entries appended since the last call, in slices if asked to, so a caller on
+a UI thread can spread a large backlog over several event-loop turns and
+search while it does. Entry ids are indexes into the source, so results can
+be read back with source.entry(id).
+
+The ids must keep pointing at the same entries, so a source may only grow.
+A HistoryStore does that only until it is full: after that every append
+shifts all ids by one. Index a full HistoryStore afresh for each search.
+"""
+import bisect
+from array import array
+
+GRAM = 3
+
+
+def _grams(text):
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+def _number(text):
+    try:
+        value = float(text)
+    except ValueError:
+        return None
+    return value if value == value else None  # Drop NaN.
+
+
+class HistoryIndex:
+    """Trigram and numeric index over a history source."""
+
+    def __init__(self, source):
+        self.source = source
+        self._postings = {}  # trigram -> array of entry ids, ascending
+        self._numeric = []   # (result value, entry id), sorted
+        self._indexed = 0    # entries [0, _indexed) are in the index
+
+    def __len__(self):
+        return self._indexed
+
+    def catch_up(self, max_entries=None):
+        """
+        Indexes the entries appended to the source since the last call.
+        With max_entries, indexes at most that many, so a large backlog can be
+        indexed in slices; returns True once the index is complete.
+        """
+        total = len(self.source)
+        if max_entries is not None:
+            total = min(total, self._indexed + max_entries)
+        postings = self._postings
+        numbers = []
+        for i in range(self._indexed, total):
+            expression, result = self.source.entry(i)
+            for gram in _grams(f"{expression}\t{result}"):
+                ids = postings.get(gram)
+                if ids is None:
+                    ids = postings[gram] = array("I")
+                ids.append(i)
+            value = _number(result)
+            if value is not None:
+                numbers.append((value, i))
+        if len(numbers) < 16:
+            for item in numbers:
+                bisect.insort(self._numeric, item)
+        elif numbers:
+            # Timsort merges the two sorted runs in linear time.
+            numbers.sort()
+            self._numeric.extend(numbers)
+            self._numeric.sort()
+        self._indexed = total
+        return total == len(self.source)
+
+    def _text_matches(self, query):
+        """Yields ids whose expression or result contains query, newest first."""
+        if len(query) < GRAM:
+            candidates = range(self._indexed - 1, -1, -1)
+        else:
+            shortest = None
+            for gram in _grams(query):
+                ids = self._postings.get(gram)
+                if ids is None:
+                    return  # Some trigram never occurs, so nothing can match.
+                if shortest is None or len(ids) < len(shortest):
+                    shortest = ids
+            # Every match is in the shortest posting list; walking it newest
+            # first lets the caller stop as soon as it has enough results.
+            candidates = reversed(shortest)
+        entry = self.source.entry
+        for i in candidates:
+            expression, result = entry(i)
+            if query in expression or query in result:
+                yield i
+
+    def range_ids(self, low, high):
+        """Returns the ids of entries whose result lies in [low, high], newest first."""
+        start = bisect.bisect_left(self._numeric, (low, -1))
+        end = bisect.bisect_right(self._numeric, (high, float("inf")))
+        return sorted((i for _, i in self._numeric[start:end]), reverse=True)
+
+    def search(self, query, limit=100):
+        """
+        Returns up to limit entry ids matching query, newest first.
+        "lo..hi" selects results in a numeric range; any other query matches
+        expressions and results containing it, plus results equal to it when
+        it is a number. Entries not yet indexed by catch_up() are not searched.
+        """
+        query = query.strip()
+        if not query:
+            return list(range(self._indexed - 1, max(self._indexed - limit, 0) - 1, -1))
+        low, sep, high = query.partition("..")
+        if sep:
+            low, high = _number(low), _number(high)
+            if low is not None and high is not None:
+                return self.range_ids(low, high)[:limit]
+        found = []
+        seen = set()
+        value = _number(query)
+        if value is not None:
+            for i in self.range_ids(value, value):
+                if i not in seen:
+                    seen.add(i)
+                    found.append(i)
+        for i in self._text_matches(query):
+            if i not in seen:
+                seen.add(i)
+                found.append(i)
+            if len(found) >= limit:
+                break
+        found.sort(reverse=True)
+        return found[:limit]
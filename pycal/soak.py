@@ -0,0 +1,137 @@
+"""
+Soak test: synthetic input for hours with memory profiling.
+
+    python -m pycal.soak [--hours H] [--rate N] [--interval SECONDS]
+                         [--report FILE] [--seed N] [VERSION_FILE]
+
+Loads a PyCal version (PyCal.V16.py by default) the same way as
+pycal.benchmark, runs its real Tk main loop and feeds it a seeded random
+stream of keystrokes, evaluations, clears and, where the version has
+on_button_click, scientific and memory keys. Some of the expressions are
+invalid on purpose, so error paths get exercised too. A MemoryProfiler
+appends a report to --report at every interval; growth that keeps showing up
+in "since start" points at a leak.
+
+Like the benchmark, it needs an X display and starts Xvfb if DISPLAY is unset.
+"""
+import os
+import random
+import sys
+import tempfile
+
+from pycal.benchmark import ROOT, make_target, virtual_display
+
+DEFAULT_HOURS = 4.0
+DEFAULT_RATE = 20          # Input actions per second.
+DEFAULT_INTERVAL = 300     # Seconds between memory samples.
+
+# Keys pressed through on_button_click, where a version has it.
+EXTRA_LABELS = ("√", "|x|", "log", "ln", "sin", "cos", "tan", "±", "MC", "MR", "M+", "M-")
+
+
+def synthetic_actions(rng, extra_labels=()):
+    """Yields ("type", text), ("calculate",), ("backspace",), ("clear",) and ("press", label)."""
+    operators = "+-*/"
+    while True:
+        choice = rng.random()
+        if choice < 0.05:
+            yield ("type", rng.choice(("1/0", "2+*3", "((4", "9**9**9**9")))
+        else:
+            yield ("type", f"{rng.randint(0, 9999)}{rng.choice(operators)}{rng.randint(1, 999)}")
+        if rng.random() < 0.2:
+            yield ("backspace",)
+        if extra_labels and rng.random() < 0.3:
+            yield ("press", rng.choice(extra_labels))
+        yield ("calculate",)
+        if rng.random() < 0.1:
+            yield ("clear",)
+
+
+class SoakDriver:
+    """Feeds actions to a benchmark target from the Tk event loop, rate per second."""
+
+    def __init__(self, target, rate, seed=0):
+        self.target = target
+        self.interval_ms = max(1, round(1000 / rate))
+        app = getattr(target, "app", None)
+        extra = EXTRA_LABELS if hasattr(app, "on_button_click") else ()
+        self.actions = synthetic_actions(random.Random(seed), extra)
+        self.count = 0
+        self.after_id = None
+
+    def start(self):
+        self.after_id = self.target.root.after(self.interval_ms, self.step)
+        return self
+
+    def step(self):
+        action = next(self.actions)
+        target = self.target
+        if action[0] == "type":
+            for key in action[1]:
+                try:
+                    target.type_key(key)
+                except Exception:
+                    pass  # A key this version does not have.
+        elif action[0] == "calculate":
+            target.calculate()
+        elif action[0] == "backspace":
+            try:
+                target.type_key("⌫")
+            except Exception:
+                pass
+        elif action[0] == "clear":
+            target.clear()
+        else:
+            target.app.on_button_click(action[1])
+        self.count += 1
+        self.after_id = target.root.after(self.interval_ms, self.step)
+
+
+def build_parser():
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog="python -m pycal.soak",
+        description="Drive a PyCal version with synthetic input and profile its memory.")
+    parser.add_argument("file", nargs="?", default=str(ROOT / "PyCal.V16.py"), metavar="VERSION_FILE",
+                        help="version file (default: PyCal.V16.py)")
+    parser.add_argument("--hours", type=float, default=DEFAULT_HOURS,
+                        help=f"how long to run (default: {DEFAULT_HOURS:g})")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, metavar="N",
+                        help=f"input actions per second (default: {DEFAULT_RATE})")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, metavar="SECONDS",
+                        help=f"seconds between memory samples (default: {DEFAULT_INTERVAL})")
+    parser.add_argument("--report", default="soak-report.txt", metavar="FILE",
+                        help="memory report, appended to (default: soak-report.txt)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+    return parser
+
+
+def main(argv=None):
+    import tkinter as tk
+    from pycal.memprofile import MemoryProfiler
+    args = build_parser().parse_args(argv)
+    if args.rate <= 0 or args.hours <= 0 or args.interval <= 0:
+        build_parser().error("--hours, --rate and --interval must be positive")
+    mainloop = tk.Misc.mainloop  # load_version() disables it for V01's import.
+    with virtual_display() as display, tempfile.TemporaryDirectory() as home:
+        os.environ["DISPLAY"] = display
+        os.environ["PYCAL_HOME"] = home   # Keep the soak history out of the user's.
+        target = make_target(args.file)
+        root = target.root
+        profiler = MemoryProfiler(root, args.report, interval_ms=round(args.interval * 1000)).start()
+        driver = SoakDriver(target, args.rate, args.seed).start()
+
+        def finish():
+            profiler.sample()
+            profiler.stop()
+            print(f"{driver.count} actions, {profiler.samples} samples in {args.report}",
+                  file=sys.stderr)
+            target.close()
+
+        root.after(round(args.hours * 3600 * 1000), finish)
+        mainloop(root)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+Startup timing for the PyCal front ends.
+
+StartupProfiler collects named marks from the moment the script started and
+reports the time spent in each phase: importing modules, constructing the
+widgets, and getting the first frame on screen. after_first_paint() tells
+when that happened: it waits for the first <Expose> of a widget and then for
+Tk to become idle, by which point the widget's redraw has run.
+
+    started = time.perf_counter()   # first line of the script
+    ...imports...
+    profiler = StartupProfiler(started)
+    profiler.mark("import")
+"""
+import sys
+import time
+
+
+class StartupProfiler:
+    """Named marks on the perf_counter clock, reported as phase durations."""
+
+    def __init__(self, started=None, output=sys.stderr):
+        self.started = time.perf_counter() if started is None else started
+        self.output = output
+        self.marks = []          # (name, perf_counter) in order
+        self.on_finish = []      # Called with the profiler by finish().
+
+    def mark(self, name):
+        """Ends the phase called name now."""
+        self.marks.append((name, time.perf_counter()))
+
+    def phases(self):
+        """Returns [(name, milliseconds)] for each phase, in order."""
+        result = []
+        previous = self.started
+        for name, at in self.marks:
+            result.append((name, (at - previous) * 1000))
+            previous = at
+        return result
+
+    def total(self):
+        """Milliseconds from the start to the last mark."""
+        return (self.marks[-1][1] - self.started) * 1000 if self.marks else 0.0
+
+    def report(self):
+        """One line such as "startup: import 41.2 ms, widgets 95.0 ms, ..., total 160.4 ms"."""
+        parts = [f"{name} {ms:.1f} ms" for name, ms in self.phases()]
+        parts.append(f"total {self.total():.1f} ms")
+        return "startup: " + ", ".join(parts)
+
+    def finish(self):
+        """Prints the report and runs the on_finish callbacks."""
+        if self.output is not None:
+            print(self.report(), file=self.output, flush=True)
+        for callback in self.on_finish:
+            callback(self)
+
+
+def after_first_paint(widget, callback):
+    """Calls callback() once, when Tk is idle after widget was first drawn."""
+    fired = []
+
+    def on_expose(event):
+        if not fired:
+            fired.append(True)
+            widget.after_idle(callback)
+
+    widget.bind("<Expose>", on_expose, add="+")
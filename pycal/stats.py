@@ -0,0 +1,99 @@
+"""
+Always-on operation counters.
+
+Each operation (optionally split by function, e.g. calculate_operation for
+sqrt) has a Counter with its call count, error count, and cumulative and
+maximum time in nanoseconds. Callers take one perf_counter_ns() reading before
+and one after the work and pass the difference to Counter.add(), so the cost
+per call is two clock reads and a few integer additions.
+
+OperationStats.export() writes all counters either as JSON or in the
+Prometheus text exposition format, for example for node_exporter's textfile
+collector. The file is replaced atomically.
+"""
+import os
+
+PROMETHEUS_PREFIX = "pycal_operation"
+
+
+class Counter:
+    __slots__ = ("count", "errors", "total_ns", "max_ns")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, ns, error=False):
+        self.count += 1
+        if error:
+            self.errors += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def as_dict(self):
+        return {"count": self.count, "errors": self.errors,
+                "total_ms": self.total_ns / 1e6, "max_ms": self.max_ns / 1e6}
+
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class OperationStats:
+    """Counters keyed by (operation, function); function is "" when not split."""
+
+    def __init__(self):
+        self.counters = {}
+
+    def counter(self, operation, function=""):
+        counter = self.counters.get((operation, function))
+        if counter is None:
+            counter = self.counters[operation, function] = Counter()
+        return counter
+
+    def as_dict(self):
+        """{operation: {function: counter dict}}, function "" for unsplit operations."""
+        result = {}
+        for (operation, function), counter in sorted(self.counters.items()):
+            result.setdefault(operation, {})[function] = counter.as_dict()
+        return result
+
+    def prometheus_text(self, prefix=PROMETHEUS_PREFIX):
+        metrics = (
+            ("calls_total", "counter", "Calls per operation.", lambda c: c.count),
+            ("errors_total", "counter", "Calls that ended in an error.", lambda c: c.errors),
+            ("seconds_total", "counter", "Cumulative time spent.", lambda c: c.total_ns / 1e9),
+            ("seconds_max", "gauge", "Longest single call.", lambda c: c.max_ns / 1e9),
+        )
+        items = sorted(self.counters.items())
+        lines = []
+        for suffix, kind, help_text, value in metrics:
+            name = f"{prefix}_{suffix}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (operation, function), counter in items:
+                labels = f'operation="{_label(operation)}"'
+                if function:
+                    labels += f',function="{_label(function)}"'
+                lines.append(f"{name}{{{labels}}} {value(counter)}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path, format=None):
+        """
+        Writes the counters to path as "json" or "prometheus" text; by default
+        the format follows the file extension (.json, anything else Prometheus).
+        """
+        if format is None:
+            format = "json" if path.endswith(".json") else "prometheus"
+        if format == "json":
+            import json
+            text = json.dumps(self.as_dict(), indent=1) + "\n"
+        else:
+            text = self.prometheus_text()
+        temporary = path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temporary, path)
@@ -0,0 +1,109 @@
+"""
+Event-loop stall watchdog.
+
+StallWatchdog keeps a heartbeat running on the Tk event loop with
+widget.after() and watches it from a daemon thread. When the heartbeat is
+later than the threshold, the main thread is blocked (a long evaluation, a
+heavy redraw), and the watchdog logs how long it has been stuck together with
+the main thread's Python stack from sys._current_frames(). When the
+heartbeat resumes, the total stall duration is logged.
+
+Records go to a size-rotated log file. The logging machinery is only set up
+when the first stall is written, so an idle watchdog costs a timer and a
+sleeping thread.
+
+A single C call that never releases the GIL (e.g. an enormous integer power)
+also blocks the monitor thread; such a stall is reported as soon as the
+thread gets to run again, with the stack at that point.
+"""
+import sys
+import threading
+import time
+
+HEARTBEAT_MS = 100
+STALL_SECONDS = 0.5
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+
+
+class StallWatchdog:
+    """Logs main-thread stalls of widget's event loop to log_path."""
+
+    def __init__(self, widget, log_path, heartbeat_ms=HEARTBEAT_MS, threshold=STALL_SECONDS,
+                 max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+        self.widget = widget
+        self.log_path = log_path
+        self.heartbeat_ms = heartbeat_ms
+        self.threshold = threshold
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.main_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self.stall_started = None   # last_beat of the stall being reported
+        self.stalls = 0
+        self.after_id = None
+        self.logger = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Starts the heartbeat and the monitor thread; call from the Tk thread."""
+        self.main_thread_id = threading.get_ident()
+        self.beat()
+        self._thread = threading.Thread(target=self._monitor, name="pycal-watchdog", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self.after_id is not None:
+            self.widget.after_cancel(self.after_id)
+            self.after_id = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        if self.logger is not None:
+            for handler in self.logger.handlers:
+                handler.close()
+
+    def beat(self):
+        self.last_beat = time.monotonic()
+        self.after_id = self.widget.after(self.heartbeat_ms, self.beat)
+
+    def _monitor(self):
+        period = self.heartbeat_ms / 1000
+        while not self._stop.wait(period):
+            last_beat = self.last_beat
+            late = time.monotonic() - last_beat - period
+            if self.stall_started is not None and last_beat != self.stall_started:
+                # The heartbeat ran again: the stall is over.
+                self._log(f"stall ended after {last_beat - self.stall_started - period:.3f}s")
+                self.stall_started = None
+            if self.stall_started is None and late > self.threshold:
+                self.stall_started = last_beat
+                self.stalls += 1
+                self._log(f"main thread stalled for {late:.3f}s\n{self.main_stack()}")
+
+    def main_stack(self):
+        import traceback  # Only needed once there is a stall to report.
+        frame = sys._current_frames().get(self.main_thread_id)
+        if frame is None:
+            return "(main thread stack unavailable)"
+        return "".join(traceback.format_stack(frame)).rstrip()
+
+    def _log(self, message):
+        if self.logger is None:
+            import logging
+            from logging.handlers import RotatingFileHandler
+            try:
+                handler = RotatingFileHandler(self.log_path, maxBytes=self.max_bytes,
+                                              backupCount=self.backups, encoding="utf-8")
+            except OSError:
+                self._stop.set()  # Nowhere to write to; stop watching.
+                return
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logger = logging.getLogger("pycal.watchdog")
+            logger.propagate = False
+            logger.setLevel(logging.WARNING)
+            logger.addHandler(handler)
+            self.logger = logger
+        self.logger.warning(message)
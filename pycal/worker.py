@@ -0,0 +1,157 @@
+"""
+Background evaluation in a separate process.
+
+Big-integer arithmetic such as 9**9**9 runs inside a single C call that holds
+the GIL, so a thread cannot keep the UI responsive or be interrupted. Each
+EvaluationJob therefore runs in its own process, which can be terminated at
+any time. The GUI polls the job from its event loop with root.after().
+
+A job can also be given CPU-time and memory limits, which are applied to the
+child process with setrlimit() where the platform supports it.
+
+The GUI runs threads next to Tk (the stall watchdog, for one), and forking a
+multi-threaded process can deadlock the child on a lock some other thread
+held. Jobs are therefore started from a forkserver, or with spawn where there
+is none, never by forking the caller.
+"""
+import multiprocessing
+import signal
+
+from pycal.engine import evaluate
+
+
+class EvaluationError(Exception):
+    """Raised by EvaluationJob.result() when the evaluation failed."""
+
+
+class ResourceLimitError(EvaluationError):
+    """Raised by EvaluationJob.result() when the job hit its CPU or memory limit."""
+
+
+# Start method for job processes; see the module docstring.
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+# Signals the kernel uses to stop a process that exceeds RLIMIT_CPU.
+_LIMIT_SIGNALS = {getattr(signal, name) for name in ("SIGXCPU", "SIGKILL") if hasattr(signal, name)}
+
+
+def _current_address_space():
+    """Returns the virtual memory size of this process in bytes, or 0."""
+    try:
+        import resource
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[0]) * resource.getpagesize()
+    except (ImportError, OSError, ValueError):
+        return 0
+
+
+def _apply_limits(cpu_seconds, memory_bytes):
+    try:
+        import resource
+    except ImportError:
+        return  # Not available on Windows; the job can still be cancelled.
+    if cpu_seconds:
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        if hard == resource.RLIM_INFINITY or hard > cpu_seconds:
+            resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, hard))
+    if memory_bytes:
+        # The child inherits the parent's mappings, so the budget is on top of those.
+        limit = _current_address_space() + memory_bytes
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard == resource.RLIM_INFINITY or hard > limit:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _run(conn, expression, cpu_seconds=None, memory_bytes=None):
+    """Child process entry point: evaluates and sends back the display text."""
+    try:
+        _apply_limits(cpu_seconds, memory_bytes)
+        conn.send(("ok", str(evaluate(expression))))
+    except MemoryError:
+        conn.send(("limit", "memory limit exceeded"))
+    except BaseException as exc:
+        conn.send(("error", f"{type(exc).__name__}: {exc}"))
+    finally:
+        conn.close()
+
+
+class EvaluationJob:
+    """
+    Evaluates one expression in a child process.
+    Call start(), then poll() until it returns True, then result().
+    """
+    def __init__(self, expression, cpu_seconds=None, memory_bytes=None):
+        self.expression = expression
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_bytes
+        self._process = None
+        self._conn = None
+        self._outcome = None
+
+    def start(self):
+        ctx = multiprocessing.get_context(START_METHOD)
+        self._conn, child_conn = ctx.Pipe(duplex=False)
+        self._process = ctx.Process(target=_run, args=(child_conn, self.expression,
+                                          self.cpu_seconds, self.memory_bytes),
+                                    daemon=True)
+        self._process.start()
+        child_conn.close()
+        return self
+
+    def poll(self):
+        """Returns True once the job has finished, failed or was cancelled."""
+        if self._outcome is not None:
+            return True
+        if self._conn.poll():
+            try:
+                self._outcome = self._conn.recv()
+            except EOFError:
+                self._outcome = self._exit_outcome()
+        elif not self._process.is_alive():
+            self._outcome = self._exit_outcome()
+        else:
+            return False
+        self._cleanup()
+        return True
+
+    def wait(self, timeout=None):
+        """Blocks until the job has finished (or timeout seconds passed); returns poll()."""
+        if self._outcome is None:
+            self._conn.poll(timeout)
+        return self.poll()
+
+    def _exit_outcome(self):
+        """Describes a child that exited without sending a result."""
+        self._process.join(timeout=1)
+        code = self._process.exitcode
+        if code is not None and -code in _LIMIT_SIGNALS:
+            return ("limit", "CPU time limit exceeded")
+        return ("error", f"worker exited with code {code}")
+
+    def result(self):
+        """
+        Returns the display text of the result.
+        Raises ResourceLimitError if a limit was hit and EvaluationError otherwise.
+        """
+        if not self.poll():
+            raise EvaluationError("evaluation is still running")
+        status, value = self._outcome
+        if status == "limit":
+            raise ResourceLimitError(value)
+        if status != "ok":
+            raise EvaluationError(value)
+        return value
+
+    def cancel(self):
+        """Stops the evaluation if it is still running."""
+        if self._outcome is None:
+            self._outcome = ("error", "cancelled")
+            if self._process is not None:
+                self._process.terminate()
+            self._cleanup()
+
+    def _cleanup(self):
+        if self._process is not None:
+            self._process.join(timeout=1)
+        if self._conn is not None:
+            self._conn.close()
@@ -0,0 +1,78 @@
+"""
+The cost estimate must bound what evaluation actually produces, and route()
+must keep cheap expressions inline and refuse results that cannot be shown.
+"""
+import math
+import random
+import sys
+import unittest
+
+from pycal.cost import GUARDED, INLINE, REJECT, estimate, route, route_expression
+from pycal.engine import compile_expression
+
+
+def routed(text):
+    return route(estimate(compile_expression(text).tree))
+
+
+class RouteTest(unittest.TestCase):
+
+    def test_everyday_expressions_are_inline(self):
+        for text in ("1+1", "(2+3)*4", "2**10", "sqrt(16)", "10/3", "2.0**1000"):
+            with self.subTest(text=text):
+                self.assertEqual(routed(text), INLINE)
+
+    def test_results_too_long_to_show_are_rejected(self):
+        for text in ("9**9**9", "2**1000000", "7**7**7", "10**4300"):
+            with self.subTest(text=text):
+                self.assertEqual(routed(text), REJECT)
+
+    def test_huge_exponents_do_not_overflow_the_estimate(self):
+        self.assertEqual(routed("7**7994692**31"), REJECT)
+
+    def test_small_result_of_large_work_is_guarded(self):
+        self.assertEqual(routed("3**(10**7) % 7"), GUARDED)
+
+    def test_inline_int_results_can_be_displayed(self):
+        limit = sys.get_int_max_str_digits() if hasattr(sys, "get_int_max_str_digits") else 0
+        for text in ("10**4299", "2**14000"):
+            expression = compile_expression(text)
+            self.assertEqual(route_expression(expression), INLINE)
+            if limit:
+                self.assertLessEqual(len(str(expression())), limit)
+
+
+class EstimateTest(unittest.TestCase):
+
+    def test_digits_bound_random_integer_results(self):
+        rng = random.Random(5)
+        for _ in range(2000):
+            parts = []
+            for _ in range(rng.randint(1, 6)):
+                parts.append(str(rng.randint(0, 10 ** rng.randint(1, 12))))
+                parts.append(rng.choice(["+", "-", "*", "//", "%", "**"]))
+            text = "".join(parts[:-1])
+            expression = compile_expression(text)
+            cost = estimate(expression.tree)
+            if route(cost) != INLINE:
+                continue  # Too slow to evaluate in a test.
+            try:
+                value = expression()
+            except ZeroDivisionError:
+                continue
+            if isinstance(value, int) and abs(value) > 1:
+                self.assertLessEqual(math.log10(abs(value)), cost.digits + 1e-9, text)
+
+    def test_shortcut_agrees_with_the_full_estimate(self):
+        rng = random.Random(9)
+        for _ in range(2000):
+            text = "".join(rng.choice("0123456789+-*%()") for _ in range(rng.randint(1, 60)))
+            try:
+                expression = compile_expression(text)
+            except ValueError:
+                continue
+            self.assertEqual(route_expression(expression), route(estimate(expression.tree)), text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+HistoryLog must survive reopening, interrupted flushes and a second writer.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from pycal.historylog import DATA_FILE, INDEX_FILE, HistoryLog, LogInUse, fcntl
+
+
+class HistoryLogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def open_log(self):
+        log = HistoryLog(self.directory)
+        self.addCleanup(log.close)
+        return log
+
+    def test_entries_survive_reopening(self):
+        log = HistoryLog(self.directory)
+        for i in range(10):
+            log.append(f"{i}+1", i + 1)
+        log.close()
+        log = self.open_log()
+        self.assertEqual(len(log), 10)
+        self.assertEqual(log.entry(0), ("0+1", "1"))
+        self.assertEqual(log.last(2), ["8+1 = 9", "9+1 = 10"])
+
+    def test_separators_are_kept_out_of_records(self):
+        log = HistoryLog(self.directory)
+        log.append("1\t+\n1", 2)
+        log.close()
+        self.assertEqual(self.open_log().entry(0), ("1 + 1", "2"))
+
+    def test_unindexed_data_is_dropped(self):
+        log = HistoryLog(self.directory)
+        log.append("1+1", 2)
+        log.close()
+        with open(self.path(DATA_FILE), "ab") as data:
+            data.write(b"2+2\t4\n3+")  # Crash between the data and index writes.
+        log = self.open_log()
+        self.assertEqual(len(log), 1)
+        self.assertEqual(os.path.getsize(self.path(DATA_FILE)), len(b"1+1\t2\n"))
+
+    def test_index_past_the_data_is_dropped(self):
+        log = HistoryLog(self.directory)
+        log.append("1+1", 2)
+        log.append("2+2", 4)
+        log.close()
+        with open(self.path(DATA_FILE), "r+b") as data:
+            data.truncate(len(b"1+1\t2\n2+2"))
+        log = self.open_log()
+        self.assertEqual(len(log), 1)
+        self.assertEqual(os.path.getsize(self.path(INDEX_FILE)), 8)
+
+    def test_flush_after_a_partial_write_rewrites_the_batch(self):
+        log = self.open_log()
+        log.append("1+1", 2)
+        log.flush()
+        log.append("2+2", 4)
+        with open(self.path(DATA_FILE), "ab") as data:
+            data.write(b"2+2\t")  # What a failed flush leaves behind.
+        log.flush()
+        self.assertEqual(log.last(2), ["1+1 = 2", "2+2 = 4"])
+        with open(self.path(DATA_FILE), "rb") as data:
+            self.assertEqual(data.read(), b"1+1\t2\n2+2\t4\n")
+
+    @unittest.skipIf(fcntl is None, "no file locking on this platform")
+    def test_second_writer_is_refused(self):
+        log = HistoryLog(self.directory)
+        with self.assertRaises(LogInUse):
+            HistoryLog(self.directory)
+        log.close()
+        self.open_log()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+IncrementalParser must give the same preview as parsing the text from scratch,
+whatever sequence of edits led to it.
+"""
+import random
+import unittest
+
+from pycal.preview import IncrementalParser
+
+PIECES = list("0123456789.+-*/()eE ") + ["**", "//", "%", "sqrt(", "pi", "1e5", "2E-3", "8e+"]
+
+
+def full_preview(text):
+    parser = IncrementalParser()
+    parser.update(text)
+    return parser.preview()
+
+
+def random_edits(rng, steps):
+    """Yields (text, start) after each random insert or delete, mostly at the end."""
+    text = ""
+    for _ in range(steps):
+        at_end = rng.random() < 0.7
+        if text and rng.random() < 0.25:
+            end = len(text) if at_end else rng.randint(1, len(text))
+            start = end - rng.randint(1, min(3, end))
+            text = text[:start] + text[end:]
+        else:
+            start = len(text) if at_end else rng.randint(0, len(text))
+            text = text[:start] + rng.choice(PIECES) + text[start:]
+        yield text, start
+
+
+class IncrementalParserTest(unittest.TestCase):
+
+    def type_text(self, text):
+        parser = IncrementalParser()
+        for i in range(1, len(text) + 1):
+            parser.update(text[:i], i - 1)
+        return parser
+
+    def test_typed_exponents(self):
+        for text in ("8e-5", "8e+3", "1E+5", "2*8e-5+1", "3.5e2**2"):
+            with self.subTest(text=text):
+                self.assertEqual(self.type_text(text).preview(), full_preview(text))
+
+    def test_backspace_into_exponent(self):
+        parser = IncrementalParser()
+        parser.update("1E+55")
+        parser.update("1E+5", 4)
+        self.assertEqual(parser.preview(), "100000.0")
+
+    def test_random_edits_match_full_parse(self):
+        rng = random.Random(20260)
+        for _ in range(2000):
+            parser = IncrementalParser()
+            for text, start in random_edits(rng, 12):
+                parser.update(text, start)
+                self.assertEqual(parser.preview(), full_preview(text), text)
+
+
+if __name__ == "__main__":
+    unittest.main()